@@ -6,6 +6,7 @@ from bachelier import show_bachelier_page      # Importing from bachelier.py
 from black_scholes import show_black_scholes_page  # Importing from black_scholes.py
 from binomial import show_binomial_page        # Importing from binomial.py
 from comparison import show_comparison_page    # Importing from comparison.py
+from sabr import show_sabr_page                # Importing from sabr.py
 
 # Set up the sidebar for navigation
 st.set_page_config(page_title="Option Pricing Models", layout="wide")
@@ -18,8 +19,8 @@ if "selected_page" not in st.session_state:
 with st.sidebar:
     selected_page = option_menu(
         "Navigation",
-        ["Home", "Black-Scholes", "Binomial", "Monte Carlo", "Heston", "Bachelier"],
-        icons=["house", "bar-chart", "graph-up", "calculator", "pie-chart", "graph-up"],
+        ["Home", "Black-Scholes", "Binomial", "Monte Carlo", "Heston", "Bachelier", "SABR"],
+        icons=["house", "bar-chart", "graph-up", "calculator", "pie-chart", "graph-up", "activity"],
         menu_icon="cast",
         default_index=0,
         key="menu"
@@ -48,3 +49,6 @@ elif st.session_state["selected_page"] == "Heston":
 
 elif st.session_state["selected_page"] == "Bachelier":
     show_bachelier_page()
+
+elif st.session_state["selected_page"] == "SABR":
+    show_sabr_page()
@@ -0,0 +1,244 @@
+import itertools
+import json
+import math
+import os
+import time
+
+import numpy as np
+from scipy.stats import norm
+
+from black_scholes import black_scholes
+
+# Location of the profiled cost model; it holds machine-specific timings, so it is not committed
+DEFAULT_MODEL_PATH = os.environ.get("OPTION_PRICING_AUTOTUNE", "autotune_model.json")
+
+# Version of the stored cost model; models of another version are ignored until re-profiled
+MODEL_VERSION = 2
+
+# Contract grid (moneyness S/X, maturity, volatility, rate) and engine settings profiled
+PROFILE_GRID = {
+    "moneyness": [0.5, 0.7, 0.85, 1.0, 1.15, 1.3, 1.6, 2.0],
+    "T": [0.1, 0.5, 1.0, 2.5, 5.0],
+    "sigma": [0.05, 0.2, 0.4, 0.7, 1.0],
+    "r": [0.0, 0.05, 0.1, 0.2],
+}
+ENGINES = {
+    # Error model: error <= coef * X * n^(-alpha); cost model: time = a + b * n^power
+    "binomial": {"setting": "N", "alpha": 1.0, "power": 2.0, "grid": [25, 35, 50, 70, 100, 140, 200, 280, 400],
+                 "time_grid": [50, 200, 800, 3200], "min": 10, "max": 20000},
+    "monte_carlo": {"setting": "iterations", "alpha": 0.5, "power": 1.0, "grid": [2000, 8000, 32000],
+                    "time_grid": [2000, 32000, 512000], "min": 1000, "max": 5000000},
+}
+PROFILE_STRIKE = 100.0
+PROFILE_RATE = 0.05  # Rate of the timing runs
+CONFIDENCE = 0.95
+# Factor on the profiled error coefficients: the lattice error oscillates with N, and the
+# sampled settings and grid corners do not always catch its peaks
+ERROR_MARGIN = 1.2
+# Lattice steps of the reference price for American exercise, which has no closed form
+AMERICAN_REFERENCE_STEPS = 4000
+
+
+# Best-of-n wall-clock time of a call
+def _time_call(func, *args, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# Least-squares fit of time = a + b * n^power
+def _fit_time_model(settings: list, timings: list, power: float) -> list:
+    design = np.column_stack([np.ones(len(settings)), np.asarray(settings, dtype=float) ** power])
+    a, b = np.linalg.lstsq(design, np.asarray(timings), rcond=None)[0]
+    return [max(float(a), 0.0), max(float(b), 1e-12)]
+
+
+# Pricing function profiled for an engine; imported here because the engine pages import this module
+def _engine_function(engine: str):
+    if engine == "binomial":
+        from binomial import binomial_option_pricing
+        return binomial_option_pricing
+    from monte_carlo import monte_carlo_option_pricing_stats
+    return monte_carlo_option_pricing_stats
+
+
+# Error coefficient of one engine at one contract, normalized by the strike
+def _error_coefficient(engine: str, S: float, T: float, r: float, sigma: float, option_type: str,
+                       american: bool = False) -> float:
+    X = PROFILE_STRIKE
+    spec = ENGINES[engine]
+    func = _engine_function(engine)
+    if engine == "binomial":
+        # Envelope of the oscillating lattice error against the closed form, or for American
+        # exercise against the mean of two fine lattices, which cancels the odd/even oscillation
+        if american:
+            reference = 0.5 * sum(func(S, X, T, r, sigma, n, option_type, True)
+                                  for n in (AMERICAN_REFERENCE_STEPS, AMERICAN_REFERENCE_STEPS + 1))
+        else:
+            reference = black_scholes(S, X, T, r, sigma, option_type)
+        return max(abs(func(S, X, T, r, sigma, n, option_type, american) - reference) * n ** spec["alpha"]
+                   for n in spec["grid"]) / X
+    # Confidence half-width of the estimator: z * std(payoff) / sqrt(n)
+    result = func(S, X, T, r, sigma, spec["grid"][-1], option_type)
+    z_score = norm.ppf(0.5 + 0.5 * CONFIDENCE)
+    return z_score * result["std_error"] * math.sqrt(result["paths"]) / X
+
+
+# Profile every engine over the contract grid and store the cost model
+def profile_engines(path: str = DEFAULT_MODEL_PATH, engines: list = None) -> dict:
+    """
+    Measure each engine's error and runtime over the parameter grid and save the cost model.
+
+    Errors are measured against black_scholes for the lattice and as the
+    confidence half-width for Monte Carlo, and summarized per grid point as
+    a coefficient of the engine's convergence rate. The lattice also gets an
+    'american_put' table, measured against a fine lattice; an American call
+    on a non-dividend stock is worth the European call. Runtime is fitted as
+    a + b * setting^power (quadratic for the lattice, linear for Monte Carlo).
+
+    Parameters:
+    - path: JSON file for the cost model, None to skip saving (str)
+    - engines: Engines to profile, all by default (list)
+
+    Returns:
+    - The cost model (dict).
+    """
+    engines = list(ENGINES) if engines is None else engines
+    model = {"version": MODEL_VERSION, "grid": PROFILE_GRID, "engines": {}}
+    for engine in engines:
+        spec = ENGINES[engine]
+        coefficients = {}
+        tables = [("call", "call", False), ("put", "put", False)]
+        if engine == "binomial":
+            tables.append(("american_put", "put", True))
+        for name, option_type, american in tables:
+            coefficients[name] = [
+                [
+                    [
+                        [_error_coefficient(engine, m * PROFILE_STRIKE, T, r, sigma, option_type, american)
+                         for r in PROFILE_GRID["r"]]
+                        for sigma in PROFILE_GRID["sigma"]
+                    ]
+                    for T in PROFILE_GRID["T"]
+                ]
+                for m in PROFILE_GRID["moneyness"]
+            ]
+
+        func = _engine_function(engine)
+        for n in spec["time_grid"]:
+            func(PROFILE_STRIKE, PROFILE_STRIKE, 1.0, PROFILE_RATE, 0.2, n)  # Warm up compiled kernels
+        timings = [_time_call(func, PROFILE_STRIKE, PROFILE_STRIKE, 1.0, PROFILE_RATE, 0.2, n) for n in spec["time_grid"]]
+
+        model["engines"][engine] = {
+            "setting": spec["setting"],
+            "alpha": spec["alpha"],
+            "power": spec["power"],
+            "min": spec["min"],
+            "max": spec["max"],
+            "coefficients": coefficients,
+            "time": _fit_time_model(spec["time_grid"], timings, spec["power"]),
+        }
+
+    if path is not None:
+        with open(path, "w") as f:
+            json.dump(model, f)
+    return model
+
+
+# Load a stored cost model, or None when none of the current version has been profiled yet
+def load_cost_model(path: str = DEFAULT_MODEL_PATH) -> dict:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        model = json.load(f)
+    return model if model.get("version") == MODEL_VERSION else None
+
+
+# Error coefficient of a contract: the largest value at the grid corners surrounding it,
+# or at the nearest edge outside the grid
+def _coefficient_at(grid: dict, table: list, moneyness: float, T: float, sigma: float, r: float) -> float:
+    corners = []
+    for axis, value in (("moneyness", moneyness), ("T", T), ("sigma", sigma), ("r", r)):
+        points = np.asarray(grid[axis])
+        upper = int(np.clip(np.searchsorted(points, value), 0, len(points) - 1))
+        lower = max(upper - 1, 0) if points[upper] > value else upper
+        corners.append({lower, upper})
+    return max(table[i][j][k][l] for i, j, k, l in itertools.product(*corners))
+
+
+# Pick the cheapest engine settings meeting a price tolerance
+def choose_settings(S: float, X: float, T: float, r: float, sigma: float, tol: float,
+                    option_type: str = None, american: bool = False, engines: list = None,
+                    model: dict = None) -> dict:
+    """
+    Choose the cheapest engine and setting expected to price within `tol`.
+
+    The expected error is an estimate, not a bound: the largest profiled
+    coefficient around the contract, times ERROR_MARGIN, at the engine's
+    convergence rate. Contracts outside the profiled grid use its edge.
+    With no option_type the setting covers both the call and the put.
+
+    Parameters:
+    - S: Stock price (float)
+    - X: Strike price (float)
+    - T: Time to maturity in years (float)
+    - r: Risk-free interest rate (float)
+    - sigma: Volatility (float)
+    - tol: Required absolute price accuracy (float)
+    - option_type: 'call' or 'put', None for whichever of the two needs more (str)
+    - american: Allow early exercise; only engines profiled for it are candidates (bool)
+    - engines: Candidate engines, all profiled engines by default (list)
+    - model: Cost model, loaded from DEFAULT_MODEL_PATH by default (dict)
+
+    Returns:
+    - A dict with 'engine', 'setting', 'value', 'expected_error' and 'expected_time',
+      or None when no cost model is available.
+    """
+    model = load_cost_model() if model is None else model
+    if model is None:
+        return None
+    option_types = ("call", "put") if option_type is None else (option_type,)
+    candidates = []
+    for engine, spec in model["engines"].items():
+        if engines is not None and engine not in engines:
+            continue
+        tables = spec["coefficients"]
+        if american:
+            # Early exercise only changes the put; American calls are European calls here
+            if "american_put" not in tables:
+                continue
+            names = ["american_put" if name == "put" else name for name in option_types]
+        else:
+            names = option_types
+        coef = max(_coefficient_at(model["grid"], tables[name], S / X, T, sigma, r) for name in names) * X * ERROR_MARGIN
+        n = math.ceil((coef / tol) ** (1.0 / spec["alpha"])) if coef > 0 else spec["min"]
+        n = int(min(max(n, spec["min"]), spec["max"]))
+        a, b = spec["time"]
+        candidates.append({
+            "engine": engine,
+            "setting": spec["setting"],
+            "value": n,
+            "expected_error": coef * n ** -spec["alpha"],
+            "expected_time": a + b * n ** spec["power"],
+        })
+    if not candidates:
+        return None
+    # Prefer settings that meet the tolerance; among those, the cheapest
+    return min(candidates, key=lambda c: (c["expected_error"] > tol, c["expected_time"]))
+
+
+# Setting for one engine, falling back to a default when no cost model has been profiled
+def tuned_setting(engine: str, S: float, X: float, T: float, r: float, sigma: float, tol: float,
+                  option_type: str = None, american: bool = False, default: int = None) -> int:
+    choice = choose_settings(S, X, T, r, sigma, tol, option_type, american, engines=[engine])
+    return default if choice is None else choice["value"]
+
+
+# Profile the engines on this machine and store the cost model
+if __name__ == "__main__":
+    start = time.perf_counter()
+    profile_engines()
+    print(f"Stored cost model in {DEFAULT_MODEL_PATH} ({time.perf_counter() - start:.1f}s)")
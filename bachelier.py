@@ -1,7 +1,7 @@
 import numpy as np
 from scipy.stats import norm
 import streamlit as st
-import plotly.graph_objects as go
+from page_fragments import price_panel, sweep_panel
 
 # Bachelier model function
 def bachelier_option_pricing(S: float, X: float, T: float, r: float, sigma: float, option_type: str = 'call') -> float:
@@ -29,6 +29,27 @@ def bachelier_option_pricing(S: float, X: float, T: float, r: float, sigma: floa
         # Put option pricing
         return (X - S) * norm.cdf(-d1) + sigma_abs * np.sqrt(T) * norm.pdf(-d1)
 
+# Page computations, cached on their own inputs so unrelated widget changes reuse them
+@st.cache_data(show_spinner=False)
+def _prices(S0, X, T, r, sigma):
+    return bachelier_option_pricing(S0, X, T, r, sigma, 'call'), bachelier_option_pricing(S0, X, T, r, sigma, 'put'), "", ""
+
+@st.cache_data(show_spinner=False)
+def _maturity_sweep(S0, X, T, r, sigma):
+    times = np.linspace(0.01, T, 100)
+    return times, {
+        'Call Option': [bachelier_option_pricing(S0, X, t, r, sigma, 'call') for t in times],
+        'Put Option': [bachelier_option_pricing(S0, X, t, r, sigma, 'put') for t in times],
+    }
+
+@st.cache_data(show_spinner=False)
+def _volatility_sweep(S0, X, T, r):
+    volatilities = np.linspace(0.01, 1.0, 50)
+    return volatilities, {
+        'Call Option': [bachelier_option_pricing(S0, X, T, r, vol, 'call') for vol in volatilities],
+        'Put Option': [bachelier_option_pricing(S0, X, T, r, vol, 'put') for vol in volatilities],
+    }
+
 # Bachelier model page
 def show_bachelier_page():
     st.title("Bachelier Option Pricing Model")
@@ -47,65 +68,35 @@ def show_bachelier_page():
         st.markdown("<div style='padding-top:20px;'></div>", unsafe_allow_html=True)
 
         # Calculate the call and put option prices
-        call_option_price = bachelier_option_pricing(S0, X, T, r, sigma, 'call')
-        put_option_price = bachelier_option_pricing(S0, X, T, r, sigma, 'put')
-
-        # Display prices in colorful rounded boxes
-        col3, col4 = st.columns(2)
-
-        with col3:
-            st.markdown(
-                f"""
-                <div style="background-color:#E3F2FD; border-radius:10px; padding:15px; text-align:center;">
-                    <span style="font-size:20px; color:blue;"><b>Call Option Price</b></span><br>
-                    <span style="font-size:45px; color:blue;"><b>${call_option_price:.2f}</b></span>
-                </div>
-                """, unsafe_allow_html=True
-            )
-
-        with col4:
-            st.markdown(
-                f"""
-                <div style="background-color:#FFEBEE; border-radius:10px; padding:15px; text-align:center;">
-                    <span style="font-size:20px; color:red;"><b>Put Option Price</b></span><br>
-                    <span style="font-size:45px; color:red;"><b>${put_option_price:.2f}</b></span>
-                </div>
-                """, unsafe_allow_html=True
-            )
-
-    # Graphs placed next to the inputs
+        price_panel(_prices, dict(S0=S0, X=X, T=T, r=r, sigma=sigma))
+        defer = st.toggle("Defer chart updates until Apply", key="bachelier_defer")
+
+    # Graphs placed next to the inputs; each chart is its own fragment and only
+    # recomputes when its own inputs change
     with col2:
         # Option price vs. time to maturity (first graph)
-        times = np.linspace(0.01, T, 100)
-        call_prices_over_time = [bachelier_option_pricing(S0, X, t, r, sigma, 'call') for t in times]
-        put_prices_over_time = [bachelier_option_pricing(S0, X, t, r, sigma, 'put') for t in times]
-
-        fig1 = go.Figure()
-        fig1.add_trace(go.Scatter(x=times, y=call_prices_over_time, mode='lines', name='Call Option', line=dict(color='blue')))
-        fig1.add_trace(go.Scatter(x=times, y=put_prices_over_time, mode='lines', name='Put Option', line=dict(color='red')))
-        fig1.update_layout(
-            title="Option Prices vs. Time to Maturity",
-            xaxis_title="Time to Maturity (Years)",
-            yaxis_title="Option Price",
-            height=350  # Increased height for better clarity
+        sweep_panel(
+            "bachelier_maturity", _maturity_sweep, dict(S0=S0, X=X, T=T, r=r, sigma=sigma),
+            dict(
+                title="Option Prices vs. Time to Maturity",
+                xaxis_title="Time to Maturity (Years)",
+                yaxis_title="Option Price",
+                height=350  # Increased height for better clarity
+            ),
+            deferred=defer
         )
-        st.plotly_chart(fig1)
 
         # Sensitivity Analysis: Option Price vs Volatility (second graph)
-        volatilities = np.linspace(0.01, 1.0, 50)
-        call_prices_vs_volatility = [bachelier_option_pricing(S0, X, T, r, vol, 'call') for vol in volatilities]
-        put_prices_vs_volatility = [bachelier_option_pricing(S0, X, T, r, vol, 'put') for vol in volatilities]
-
-        fig2 = go.Figure()
-        fig2.add_trace(go.Scatter(x=volatilities, y=call_prices_vs_volatility, mode='lines', name='Call Option', line=dict(color='blue')))
-        fig2.add_trace(go.Scatter(x=volatilities, y=put_prices_vs_volatility, mode='lines', name='Put Option', line=dict(color='red')))
-        fig2.update_layout(
-            title="Option Prices vs. Volatility",
-            xaxis_title="Volatility (σ)",
-            yaxis_title="Option Price",
-            height=350  # Increased height for better clarity
+        sweep_panel(
+            "bachelier_volatility", _volatility_sweep, dict(S0=S0, X=X, T=T, r=r),
+            dict(
+                title="Option Prices vs. Volatility",
+                xaxis_title="Volatility (σ)",
+                yaxis_title="Option Price",
+                height=350  # Increased height for better clarity
+            ),
+            deferred=defer
         )
-        st.plotly_chart(fig2)
 
     # Bachelier Formula with LaTeX rendering and explanations on the sides
     col_left, col_center, col_right = st.columns([1, 2, 1])
@@ -1,34 +1,56 @@
 import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
-import plotly.graph_objects as go
+from kernels import binomial_lattice
+from result_store import cached_call
+from autotune import tuned_setting
+from page_fragments import price_panel, sweep_panel
 
 # Binomial model function
-def binomial_option_pricing(S: float, X: float, T: float, r: float, sigma: float, N: int, option_type: str = 'call') -> float:
-    dt = T / N
-    u = np.exp(sigma * np.sqrt(dt))  # Upward movement factor
-    d = 1 / u  # Downward movement factor
-    p = (np.exp(r * dt) - d) / (u - d)  # Probability of upward movement
-
-    # Initialize stock price tree
-    prices = np.zeros(N + 1)
-    for i in range(N + 1):
-        prices[i] = S * (u ** (N - i)) * (d ** i)
-
-    # Initialize option values at maturity
-    option_values = np.zeros(N + 1)
-    for i in range(N + 1):
-        if option_type == 'call':
-            option_values[i] = max(0, prices[i] - X)  # Call option payoff
-        else:
-            option_values[i] = max(0, X - prices[i])  # Put option payoff
-
-    # Step backward through the tree to calculate option price
-    for j in range(N - 1, -1, -1):
-        for i in range(j + 1):
-            option_values[i] = np.exp(-r * dt) * (p * option_values[i] + (1 - p) * option_values[i + 1])
-
-    return option_values[0]
+def binomial_option_pricing(S: float, X: float, T: float, r: float, sigma: float, N: int, option_type: str = 'call', american: bool = False) -> float:
+    """
+    Cox-Ross-Rubinstein binomial option pricing model.
+
+    The backward induction runs in kernels.binomial_lattice, which uses a
+    compiled Numba kernel when Numba is installed and NumPy otherwise.
+
+    Parameters:
+    - S: Stock price (float)
+    - X: Strike price (float)
+    - T: Time to maturity in years (float)
+    - r: Risk-free interest rate (float)
+    - sigma: Volatility (float)
+    - N: Number of time steps (int)
+    - option_type: 'call' or 'put' (str)
+    - american: Allow early exercise at every node (bool)
+
+    Returns:
+    - The option price (float).
+    """
+    return binomial_lattice(S, X, T, r, sigma, N, option_type == 'call', american)
+
+# Page computations, cached on their own inputs so unrelated widget changes reuse them
+@st.cache_data(show_spinner=False)
+def _prices(S0, X, T, r, sigma, N, american):
+    # Reuses results stored by earlier runs and other processes
+    return (cached_call(binomial_option_pricing, S0, X, T, r, sigma, N, 'call', american),
+            cached_call(binomial_option_pricing, S0, X, T, r, sigma, N, 'put', american), "", "")
+
+@st.cache_data(show_spinner=False)
+def _maturity_sweep(S0, X, T, r, sigma, N, american):
+    times = np.linspace(0.01, T, 100)
+    return times, {
+        'Call Option': [binomial_option_pricing(S0, X, t, r, sigma, N, 'call', american) for t in times],
+        'Put Option': [binomial_option_pricing(S0, X, t, r, sigma, N, 'put', american) for t in times],
+    }
+
+@st.cache_data(show_spinner=False)
+def _volatility_sweep(S0, X, T, r, N, american):
+    volatilities = np.linspace(0.01, 1.0, 50)
+    return volatilities, {
+        'Call Option': [binomial_option_pricing(S0, X, T, r, vol, N, 'call', american) for vol in volatilities],
+        'Put Option': [binomial_option_pricing(S0, X, T, r, vol, N, 'put', american) for vol in volatilities],
+    }
 
 # Binomial model page
 def show_binomial_page():
@@ -54,70 +76,46 @@ def show_binomial_page():
         sigma = st.slider("Volatility (σ)", min_value=0.01, max_value=1.0, value=0.2, step=0.01)
         r = st.slider("Risk-Free Rate (r)", min_value=0.0, max_value=0.2, value=0.05, step=0.001)
         N = st.number_input("Number of Steps (N)", value=100, step=1)
+        american = st.checkbox("American Exercise", value=False)
+        auto_steps = st.checkbox("Choose Steps for a Price Tolerance", value=False)
+        if auto_steps:
+            tolerance = st.number_input("Price Tolerance", value=0.01, min_value=0.0001, step=0.001, format="%.4f")
+            N = tuned_setting('binomial', S0, X, T, r, sigma, tolerance, american=american, default=N)
+            st.caption(f"Using N = {N} steps, estimated to meet the tolerance (run `python autotune.py` to profile the engines on this machine).")
 
         # Add padding between inputs and price boxes
         st.markdown("<div style='padding-top:20px;'></div>", unsafe_allow_html=True)
 
         # Calculate the call and put option prices
-        call_option_price = binomial_option_pricing(S0, X, T, r, sigma, N, 'call')
-        put_option_price = binomial_option_pricing(S0, X, T, r, sigma, N, 'put')
-
-        # Display prices in colorful rounded boxes
-        col3, col4 = st.columns(2)
-
-        with col3:
-            st.markdown(
-                f"""
-                <div style="background-color:#E3F2FD; border-radius:10px; padding:15px; text-align:center;">
-                    <span style="font-size:20px; color:blue;"><b>Call Option Price</b></span><br>
-                    <span style="font-size:45px; color:blue;"><b>${call_option_price:.2f}</b></span>
-                </div>
-                """, unsafe_allow_html=True
-            )
-
-        with col4:
-            st.markdown(
-                f"""
-                <div style="background-color:#FFEBEE; border-radius:10px; padding:15px; text-align:center;">
-                    <span style="font-size:20px; color:red;"><b>Put Option Price</b></span><br>
-                    <span style="font-size:45px; color:red;"><b>${put_option_price:.2f}</b></span>
-                </div>
-                """, unsafe_allow_html=True
-            )
-
-    # Graphs placed next to the inputs
+        price_panel(_prices, dict(S0=S0, X=X, T=T, r=r, sigma=sigma, N=N, american=american))
+        defer = st.toggle("Defer chart updates until Apply", key="binomial_defer")
+
+    # Graphs placed next to the inputs; each chart is its own fragment and only
+    # recomputes when its own inputs change
     with col2:
         # Option price vs. time to maturity (first graph)
-        times = np.linspace(0.01, T, 100)
-        call_prices_over_time = [binomial_option_pricing(S0, X, t, r, sigma, N, 'call') for t in times]
-        put_prices_over_time = [binomial_option_pricing(S0, X, t, r, sigma, N, 'put') for t in times]
-
-        fig1 = go.Figure()
-        fig1.add_trace(go.Scatter(x=times, y=call_prices_over_time, mode='lines', name='Call Option', line=dict(color='blue')))
-        fig1.add_trace(go.Scatter(x=times, y=put_prices_over_time, mode='lines', name='Put Option', line=dict(color='red')))
-        fig1.update_layout(
-            title="Option Prices vs. Time to Maturity",
-            xaxis_title="Time to Maturity (Years)",
-            yaxis_title="Option Price",
-            height=350  # Increased height for better clarity
+        sweep_panel(
+            "binomial_maturity", _maturity_sweep, dict(S0=S0, X=X, T=T, r=r, sigma=sigma, N=N, american=american),
+            dict(
+                title="Option Prices vs. Time to Maturity",
+                xaxis_title="Time to Maturity (Years)",
+                yaxis_title="Option Price",
+                height=350  # Increased height for better clarity
+            ),
+            deferred=defer
         )
-        st.plotly_chart(fig1)
 
         # Sensitivity Analysis: Option Price vs Volatility (second graph)
-        volatilities = np.linspace(0.01, 1.0, 50)
-        call_prices_vs_volatility = [binomial_option_pricing(S0, X, T, r, vol, N, 'call') for vol in volatilities]
-        put_prices_vs_volatility = [binomial_option_pricing(S0, X, T, r, vol, N, 'put') for vol in volatilities]
-
-        fig2 = go.Figure()
-        fig2.add_trace(go.Scatter(x=volatilities, y=call_prices_vs_volatility, mode='lines', name='Call Option', line=dict(color='blue')))
-        fig2.add_trace(go.Scatter(x=volatilities, y=put_prices_vs_volatility, mode='lines', name='Put Option', line=dict(color='red')))
-        fig2.update_layout(
-            title="Option Prices vs. Volatility",
-            xaxis_title="Volatility (σ)",
-            yaxis_title="Option Price",
-            height=350  # Increased height for better clarity
+        sweep_panel(
+            "binomial_volatility", _volatility_sweep, dict(S0=S0, X=X, T=T, r=r, N=N, american=american),
+            dict(
+                title="Option Prices vs. Volatility",
+                xaxis_title="Volatility (σ)",
+                yaxis_title="Option Price",
+                height=350  # Increased height for better clarity
+            ),
+            deferred=defer
         )
-        st.plotly_chart(fig2)
 
     # Binomial Formula with LaTeX rendering and explanations on the sides
     col_left, col_center, col_right = st.columns([1, 2, 1])
@@ -1,7 +1,7 @@
 import numpy as np
 from scipy.stats import norm
 import streamlit as st
-import plotly.graph_objects as go
+from page_fragments import price_panel, sweep_panel
 
 # Black-Scholes model function
 def black_scholes(S, X, T, r, sigma, option_type='call'):
@@ -12,6 +12,27 @@ def black_scholes(S, X, T, r, sigma, option_type='call'):
     else:
         return X * np.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
 
+# Page computations, cached on their own inputs so unrelated widget changes reuse them
+@st.cache_data(show_spinner=False)
+def _prices(S0, X, T, r, sigma):
+    return black_scholes(S0, X, T, r, sigma, 'call'), black_scholes(S0, X, T, r, sigma, 'put'), "", ""
+
+@st.cache_data(show_spinner=False)
+def _maturity_sweep(S0, X, T, r, sigma):
+    times = np.linspace(0.01, T, 100)
+    return times, {
+        'Call Option': [black_scholes(S0, X, t, r, sigma, 'call') for t in times],
+        'Put Option': [black_scholes(S0, X, t, r, sigma, 'put') for t in times],
+    }
+
+@st.cache_data(show_spinner=False)
+def _volatility_sweep(S0, X, T, r):
+    volatilities = np.linspace(0.01, 1.0, 50)
+    return volatilities, {
+        'Call Option': [black_scholes(S0, X, T, r, vol, 'call') for vol in volatilities],
+        'Put Option': [black_scholes(S0, X, T, r, vol, 'put') for vol in volatilities],
+    }
+
 # Black-Scholes model page
 def show_black_scholes_page():
     st.title("Black-Scholes Option Pricing Model")
@@ -30,65 +51,35 @@ def show_black_scholes_page():
         st.markdown("<div style='padding-top:20px;'></div>", unsafe_allow_html=True)
 
         # Display calculated call and put option prices right underneath the inputs
-        call_option_price = black_scholes(S0, X, T, r, sigma, 'call')
-        put_option_price = black_scholes(S0, X, T, r, sigma, 'put')
-
-        # Display prices in colorful rounded boxes
-        col3, col4 = st.columns(2)
-
-        with col3:
-            st.markdown(
-                f"""
-                <div style="background-color:#E3F2FD; border-radius:10px; padding:15px; text-align:center;">
-                    <span style="font-size:20px; color:blue;"><b>Call Option Price</b></span><br>
-                    <span style="font-size:45px; color:blue;"><b>${call_option_price:.2f}</b></span>
-                </div>
-                """, unsafe_allow_html=True
-            )
-
-        with col4:
-            st.markdown(
-                f"""
-                <div style="background-color:#FFEBEE; border-radius:10px; padding:15px; text-align:center;">
-                    <span style="font-size:20px; color:red;"><b>Put Option Price</b></span><br>
-                    <span style="font-size:45px; color:red;"><b>${put_option_price:.2f}</b></span>
-                </div>
-                """, unsafe_allow_html=True
-            )
-
-    # Graphs placed next to the inputs
+        price_panel(_prices, dict(S0=S0, X=X, T=T, r=r, sigma=sigma))
+        defer = st.toggle("Defer chart updates until Apply", key="black_scholes_defer")
+
+    # Graphs placed next to the inputs; each chart is its own fragment and only
+    # recomputes when its own inputs change
     with col2:
         # Option price vs. time to maturity (first graph)
-        times = np.linspace(0.01, T, 100)
-        call_prices_over_time = [black_scholes(S0, X, t, r, sigma, 'call') for t in times]
-        put_prices_over_time = [black_scholes(S0, X, t, r, sigma, 'put') for t in times]
-
-        fig1 = go.Figure()
-        fig1.add_trace(go.Scatter(x=times, y=call_prices_over_time, mode='lines', name='Call Option', line=dict(color='blue')))
-        fig1.add_trace(go.Scatter(x=times, y=put_prices_over_time, mode='lines', name='Put Option', line=dict(color='red')))
-        fig1.update_layout(
-            title="Option Prices vs. Time to Maturity",
-            xaxis_title="Time to Maturity (Years)",
-            yaxis_title="Option Price",
-            height=350  # Increased height for better clarity
+        sweep_panel(
+            "black_scholes_maturity", _maturity_sweep, dict(S0=S0, X=X, T=T, r=r, sigma=sigma),
+            dict(
+                title="Option Prices vs. Time to Maturity",
+                xaxis_title="Time to Maturity (Years)",
+                yaxis_title="Option Price",
+                height=350  # Increased height for better clarity
+            ),
+            deferred=defer
         )
-        st.plotly_chart(fig1)
 
         # Sensitivity Analysis: Option Price vs Volatility (second graph)
-        volatilities = np.linspace(0.01, 1.0, 50)
-        call_prices_vs_volatility = [black_scholes(S0, X, T, r, vol, 'call') for vol in volatilities]
-        put_prices_vs_volatility = [black_scholes(S0, X, T, r, vol, 'put') for vol in volatilities]
-
-        fig2 = go.Figure()
-        fig2.add_trace(go.Scatter(x=volatilities, y=call_prices_vs_volatility, mode='lines', name='Call Option', line=dict(color='blue')))
-        fig2.add_trace(go.Scatter(x=volatilities, y=put_prices_vs_volatility, mode='lines', name='Put Option', line=dict(color='red')))
-        fig2.update_layout(
-            title="Option Prices vs. Volatility",
-            xaxis_title="Volatility (σ)",
-            yaxis_title="Option Price",
-            height=350  # Increased height for better clarity
+        sweep_panel(
+            "black_scholes_volatility", _volatility_sweep, dict(S0=S0, X=X, T=T, r=r),
+            dict(
+                title="Option Prices vs. Volatility",
+                xaxis_title="Volatility (σ)",
+                yaxis_title="Option Price",
+                height=350  # Increased height for better clarity
+            ),
+            deferred=defer
         )
-        st.plotly_chart(fig2)
 
     # Black-Scholes Formula with LaTeX rendering and explanations on the sides
     col_left, col_center, col_right = st.columns([1, 2, 1])
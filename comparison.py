@@ -2,11 +2,56 @@ import streamlit as st
 import numpy as np
 from black_scholes import black_scholes
 from binomial import binomial_option_pricing
-from monte_carlo import monte_carlo_option_pricing
+from monte_carlo import monte_carlo_option_pricing, monte_carlo_sweep
 from heston import heston_price
 from bachelier import bachelier_option_pricing
-import plotly.graph_objects as go
 import pandas as pd
+from result_store import cached_call
+from autotune import tuned_setting
+from page_fragments import sweep_panel
+
+# Trace colors of the models on the comparison charts
+MODEL_COLORS = {'Black-Scholes': 'blue', 'Binomial': 'green', 'Monte Carlo': 'red', 'Heston': 'purple', 'Bachelier': 'orange'}
+
+# Prices of every model, cached on their own inputs so unrelated widget changes reuse them
+@st.cache_data(show_spinner=False)
+def _model_prices(S0, X, T, r, sigma, N, iterations, option_type):
+    return {
+        'Black-Scholes': black_scholes(S0, X, T, r, sigma, option_type),
+        'Binomial': cached_call(binomial_option_pricing, S0, X, T, r, sigma, N, option_type),
+        'Monte Carlo': cached_call(monte_carlo_option_pricing, S0, X, T, r, sigma, iterations, option_type),
+        'Heston': heston_price(S0, X, T, r, 2.0, 0.04, sigma, -0.7, sigma**2, option_type),
+        'Bachelier': bachelier_option_pricing(S0, X, T, r, sigma, option_type)
+    }
+
+# Price table as an independently rerunning fragment
+@st.fragment
+def _price_table(S0, X, T, r, sigma, N, iterations):
+    call_prices = _model_prices(S0, X, T, r, sigma, N, iterations, 'call')
+    put_prices = _model_prices(S0, X, T, r, sigma, N, iterations, 'put')
+    prices_df = pd.DataFrame({
+        'Model': call_prices.keys(),
+        'Call Price': call_prices.values(),
+        'Put Price': put_prices.values()
+    })
+
+    # Remove index, set larger font, bold headers, and fill available space
+    st.table(prices_df.style.format({'Call Price': '${:,.2f}', 'Put Price': '${:,.2f}'})
+              .set_properties(**{'font-size': '18pt'})
+              .set_table_styles([{'selector': 'thead th', 'props': [('font-size', '20pt'), ('font-weight', 'bold')]}])
+    )
+
+# Every model's prices over a volatility grid
+@st.cache_data(show_spinner=False)
+def _volatility_sweep(S0, X, T, r, N, iterations, option_type):
+    volatilities = np.linspace(0.01, 1.0, 50)
+    return volatilities, {
+        'Black-Scholes': [black_scholes(S0, X, T, r, vol, option_type) for vol in volatilities],
+        'Binomial': [binomial_option_pricing(S0, X, T, r, vol, N, option_type) for vol in volatilities],
+        'Monte Carlo': cached_call(monte_carlo_sweep, S0, X, T, r, volatilities, iterations, option_type),
+        'Heston': [heston_price(S0, X, T, r, 2.0, 0.04, vol, -0.7, vol**2, option_type) for vol in volatilities],
+        'Bachelier': [bachelier_option_pricing(S0, X, T, r, vol, option_type) for vol in volatilities]
+    }
 
 # Comparison page
 def show_comparison_page():
@@ -29,88 +74,36 @@ def show_comparison_page():
         T = st.slider("Time to Maturity (T)", min_value=0.01, max_value=5.0, value=1.0, step=0.01)
         r = st.slider("Risk-Free Rate (r)", min_value=0.0, max_value=0.2, value=0.05, step=0.001)
         sigma = st.slider("Volatility (σ)", min_value=0.01, max_value=1.0, value=0.2, step=0.01)
+        tolerance = st.number_input("Price Tolerance", value=0.05, min_value=0.001, step=0.01, format="%.3f")
 
-    with col2:
-        # Calculate prices for both call and put options for each model
-        call_prices = {
-            'Black-Scholes': black_scholes(S0, X, T, r, sigma, 'call'),
-            'Binomial': binomial_option_pricing(S0, X, T, r, sigma, 100, 'call'),
-            'Monte Carlo': monte_carlo_option_pricing(S0, X, T, r, sigma, 10000, 'call'),
-            'Heston': heston_price(S0, X, T, r, 2.0, 0.04, sigma, -0.7, sigma**2, 'call'),
-            'Bachelier': bachelier_option_pricing(S0, X, T, r, sigma, 'call')
-        }
-
-        put_prices = {
-            'Black-Scholes': black_scholes(S0, X, T, r, sigma, 'put'),
-            'Binomial': binomial_option_pricing(S0, X, T, r, sigma, 100, 'put'),
-            'Monte Carlo': monte_carlo_option_pricing(S0, X, T, r, sigma, 10000, 'put'),
-            'Heston': heston_price(S0, X, T, r, 2.0, 0.04, sigma, -0.7, sigma**2, 'put'),
-            'Bachelier': bachelier_option_pricing(S0, X, T, r, sigma, 'put')
-        }
+        # Cheapest steps/paths estimated to meet the tolerance, from the profiled cost model when one exists
+        N = tuned_setting('binomial', S0, X, T, r, sigma, tolerance, default=100)
+        iterations = tuned_setting('monte_carlo', S0, X, T, r, sigma, tolerance, default=10000)
+        st.caption(f"Binomial: {N} steps, Monte Carlo: {iterations:,} iterations (estimated from the profiled cost model)")
 
+    with col2:
         # Display prices in a table beside inputs
         st.markdown("### Option Prices")
-        prices_df = pd.DataFrame({
-            'Model': call_prices.keys(),
-            'Call Price': call_prices.values(),
-            'Put Price': put_prices.values()
-        })
-
-        # Remove index, set larger font, bold headers, and fill available space
-        st.table(prices_df.style.format({'Call Price': '${:,.2f}', 'Put Price': '${:,.2f}'})
-                  .set_properties(**{'font-size': '18pt'})
-                  .set_table_styles([{'selector': 'thead th', 'props': [('font-size', '20pt'), ('font-weight', 'bold')]}])
+        _price_table(S0, X, T, r, sigma, N, iterations)
+
+    # Graph comparison: Call and put prices vs. Volatility, each chart its own fragment
+    defer = st.toggle("Defer chart updates until Apply", key="comparison_defer")
+    inputs = dict(S0=S0, X=X, T=T, r=r, N=N, iterations=iterations)
+    for option_type in ('call', 'put'):
+        label = option_type.capitalize()
+        sweep_panel(
+            f"comparison_{option_type}", _volatility_sweep, dict(inputs, option_type=option_type),
+            dict(
+                title=f"{label} Option Prices vs. Volatility",
+                xaxis_title="Volatility (σ)",
+                yaxis_title=f"{label} Option Price",
+                height=600,  # Increase graph height
+                width=1000,  # Increase graph width
+                legend_title="Models"
+            ),
+            colors=MODEL_COLORS,
+            deferred=defer
         )
 
-    # Graph comparison: Call prices vs. Volatility
-    volatilities = np.linspace(0.01, 1.0, 50)
-    call_bs_prices = [black_scholes(S0, X, T, r, vol, 'call') for vol in volatilities]
-    call_binomial_prices = [binomial_option_pricing(S0, X, T, r, vol, 100, 'call') for vol in volatilities]
-    call_mc_prices = [monte_carlo_option_pricing(S0, X, T, r, vol, 10000, 'call') for vol in volatilities]
-    call_heston_prices = [heston_price(S0, X, T, r, 2.0, 0.04, vol, -0.7, vol**2, 'call') for vol in volatilities]
-    call_bachelier_prices = [bachelier_option_pricing(S0, X, T, r, vol, 'call') for vol in volatilities]
-
-    fig_call = go.Figure()
-    fig_call.add_trace(go.Scatter(x=volatilities, y=call_bs_prices, mode='lines', name="Black-Scholes", line=dict(color='blue')))
-    fig_call.add_trace(go.Scatter(x=volatilities, y=call_binomial_prices, mode='lines', name="Binomial", line=dict(color='green')))
-    fig_call.add_trace(go.Scatter(x=volatilities, y=call_mc_prices, mode='lines', name="Monte Carlo", line=dict(color='red')))
-    fig_call.add_trace(go.Scatter(x=volatilities, y=call_heston_prices, mode='lines', name="Heston", line=dict(color='purple')))
-    fig_call.add_trace(go.Scatter(x=volatilities, y=call_bachelier_prices, mode='lines', name="Bachelier", line=dict(color='orange')))
-
-    fig_call.update_layout(
-        title="Call Option Prices vs. Volatility",
-        xaxis_title="Volatility (σ)",
-        yaxis_title="Call Option Price",
-        height=600,  # Increase graph height
-        width=1000,  # Increase graph width
-        legend_title="Models"
-    )
-
-    # Graph comparison: Put prices vs. Volatility
-    put_bs_prices = [black_scholes(S0, X, T, r, vol, 'put') for vol in volatilities]
-    put_binomial_prices = [binomial_option_pricing(S0, X, T, r, vol, 100, 'put') for vol in volatilities]
-    put_mc_prices = [monte_carlo_option_pricing(S0, X, T, r, vol, 10000, 'put') for vol in volatilities]
-    put_heston_prices = [heston_price(S0, X, T, r, 2.0, 0.04, vol, -0.7, vol**2, 'put') for vol in volatilities]
-    put_bachelier_prices = [bachelier_option_pricing(S0, X, T, r, vol, 'put') for vol in volatilities]
-
-    fig_put = go.Figure()
-    fig_put.add_trace(go.Scatter(x=volatilities, y=put_bs_prices, mode='lines', name="Black-Scholes", line=dict(color='blue')))
-    fig_put.add_trace(go.Scatter(x=volatilities, y=put_binomial_prices, mode='lines', name="Binomial", line=dict(color='green')))
-    fig_put.add_trace(go.Scatter(x=volatilities, y=put_mc_prices, mode='lines', name="Monte Carlo", line=dict(color='red')))
-    fig_put.add_trace(go.Scatter(x=volatilities, y=put_heston_prices, mode='lines', name="Heston", line=dict(color='purple')))
-    fig_put.add_trace(go.Scatter(x=volatilities, y=put_bachelier_prices, mode='lines', name="Bachelier", line=dict(color='orange')))
-
-    fig_put.update_layout(
-        title="Put Option Prices vs. Volatility",
-        xaxis_title="Volatility (σ)",
-        yaxis_title="Put Option Price",
-        height=600,  # Increase graph height
-        width=1000,  # Increase graph width
-        legend_title="Models"
-    )
-
-    st.plotly_chart(fig_call)
-    st.plotly_chart(fig_put)
-
 # Run the comparison page
 # show_comparison_page()
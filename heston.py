@@ -2,7 +2,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import streamlit as st
 from black_scholes import black_scholes
-import plotly.graph_objects as go
+from page_fragments import price_panel, sweep_panel
 
 # Heston model (simplified) using Black-Scholes
 def heston_price(S0: float, X: float, T: float, r: float, kappa: float, theta: float, sigma: float, rho: float, v0: float, option_type: str = 'call') -> float:
@@ -27,6 +27,28 @@ def heston_price(S0: float, X: float, T: float, r: float, kappa: float, theta: f
     sigma_avg = np.sqrt(theta)  # Using long-run variance as the average volatility
     return black_scholes(S0, X, T, r, sigma_avg, option_type)
 
+# Page computations, cached on their own inputs so unrelated widget changes reuse them
+@st.cache_data(show_spinner=False)
+def _prices(S0, X, T, r, kappa, theta, sigma, rho, v0):
+    return (heston_price(S0, X, T, r, kappa, theta, sigma, rho, v0, 'call'),
+            heston_price(S0, X, T, r, kappa, theta, sigma, rho, v0, 'put'), "", "")
+
+@st.cache_data(show_spinner=False)
+def _maturity_sweep(S0, X, T, r, kappa, theta, sigma, rho, v0):
+    times = np.linspace(0.01, T, 100)
+    return times, {
+        'Call Option': [heston_price(S0, X, t, r, kappa, theta, sigma, rho, v0, 'call') for t in times],
+        'Put Option': [heston_price(S0, X, t, r, kappa, theta, sigma, rho, v0, 'put') for t in times],
+    }
+
+@st.cache_data(show_spinner=False)
+def _volatility_sweep(S0, X, T, r, kappa, theta, rho, v0):
+    volatilities_of_vol = np.linspace(0.01, 1.0, 50)
+    return volatilities_of_vol, {
+        'Call Option': [heston_price(S0, X, T, r, kappa, theta, vol, rho, v0, 'call') for vol in volatilities_of_vol],
+        'Put Option': [heston_price(S0, X, T, r, kappa, theta, vol, rho, v0, 'put') for vol in volatilities_of_vol],
+    }
+
 # Heston model page
 def show_heston_page():
     st.title("Heston Stochastic Volatility Model")
@@ -61,65 +83,35 @@ def show_heston_page():
         st.markdown("<div style='padding-top:20px;'></div>", unsafe_allow_html=True)
 
         # Calculate the call and put option prices
-        call_option_price = heston_price(S0, X, T, r, kappa, theta, sigma, rho, v0, 'call')
-        put_option_price = heston_price(S0, X, T, r, kappa, theta, sigma, rho, v0, 'put')
-
-        # Display prices in colorful rounded boxes
-        col3, col4 = st.columns(2)
-
-        with col3:
-            st.markdown(
-                f"""
-                <div style="background-color:#E3F2FD; border-radius:10px; padding:15px; text-align:center;">
-                    <span style="font-size:20px; color:blue;"><b>Call Option Price</b></span><br>
-                    <span style="font-size:45px; color:blue;"><b>${call_option_price:.2f}</b></span>
-                </div>
-                """, unsafe_allow_html=True
-            )
-
-        with col4:
-            st.markdown(
-                f"""
-                <div style="background-color:#FFEBEE; border-radius:10px; padding:15px; text-align:center;">
-                    <span style="font-size:20px; color:red;"><b>Put Option Price</b></span><br>
-                    <span style="font-size:45px; color:red;"><b>${put_option_price:.2f}</b></span>
-                </div>
-                """, unsafe_allow_html=True
-            )
-
-    # Graphs placed next to the inputs
+        price_panel(_prices, dict(S0=S0, X=X, T=T, r=r, kappa=kappa, theta=theta, sigma=sigma, rho=rho, v0=v0))
+        defer = st.toggle("Defer chart updates until Apply", key="heston_defer")
+
+    # Graphs placed next to the inputs; each chart is its own fragment and only
+    # recomputes when its own inputs change
     with col2:
         # Option price vs. time to maturity (first graph)
-        times = np.linspace(0.01, T, 100)
-        call_prices_over_time = [heston_price(S0, X, t, r, kappa, theta, sigma, rho, v0, 'call') for t in times]
-        put_prices_over_time = [heston_price(S0, X, t, r, kappa, theta, sigma, rho, v0, 'put') for t in times]
-
-        fig1 = go.Figure()
-        fig1.add_trace(go.Scatter(x=times, y=call_prices_over_time, mode='lines', name='Call Option', line=dict(color='blue')))
-        fig1.add_trace(go.Scatter(x=times, y=put_prices_over_time, mode='lines', name='Put Option', line=dict(color='red')))
-        fig1.update_layout(
-            title="Option Prices vs. Time to Maturity",
-            xaxis_title="Time to Maturity (Years)",
-            yaxis_title="Option Price",
-            height=350  # Increased height for better clarity
+        sweep_panel(
+            "heston_maturity", _maturity_sweep, dict(S0=S0, X=X, T=T, r=r, kappa=kappa, theta=theta, sigma=sigma, rho=rho, v0=v0),
+            dict(
+                title="Option Prices vs. Time to Maturity",
+                xaxis_title="Time to Maturity (Years)",
+                yaxis_title="Option Price",
+                height=350  # Increased height for better clarity
+            ),
+            deferred=defer
         )
-        st.plotly_chart(fig1)
 
         # Sensitivity Analysis: Option Price vs Volatility of Volatility (σ)
-        volatilities_of_vol = np.linspace(0.01, 1.0, 50)
-        call_prices_vs_vol_of_vol = [heston_price(S0, X, T, r, kappa, theta, vol, rho, v0, 'call') for vol in volatilities_of_vol]
-        put_prices_vs_vol_of_vol = [heston_price(S0, X, T, r, kappa, theta, vol, rho, v0, 'put') for vol in volatilities_of_vol]
-
-        fig2 = go.Figure()
-        fig2.add_trace(go.Scatter(x=volatilities_of_vol, y=call_prices_vs_vol_of_vol, mode='lines', name='Call Option', line=dict(color='blue')))
-        fig2.add_trace(go.Scatter(x=volatilities_of_vol, y=put_prices_vs_vol_of_vol, mode='lines', name='Put Option', line=dict(color='red')))
-        fig2.update_layout(
-            title="Option Prices vs. Volatility of Volatility (σ)",
-            xaxis_title="Volatility of Volatility (σ)",
-            yaxis_title="Option Price",
-            height=350  # Increased height for better clarity
+        sweep_panel(
+            "heston_volatility", _volatility_sweep, dict(S0=S0, X=X, T=T, r=r, kappa=kappa, theta=theta, rho=rho, v0=v0),
+            dict(
+                title="Option Prices vs. Volatility of Volatility (σ)",
+                xaxis_title="Volatility of Volatility (σ)",
+                yaxis_title="Option Price",
+                height=350  # Increased height for better clarity
+            ),
+            deferred=defer
         )
-        st.plotly_chart(fig2)
 
     # Heston Formula with LaTeX rendering and explanations on the sides
     col_left, col_center, col_right = st.columns([1, 2, 1])
@@ -0,0 +1,150 @@
+import os
+import numpy as np
+
+# Numba is optional: when it is importable the hot loops below are JIT-compiled
+# (cached on disk, parallel over nodes/sweep points); otherwise the pure-NumPy
+# versions are used. Set OPTION_PRICING_NO_NUMBA=1 to force the NumPy path.
+try:
+    import numba
+    HAS_NUMBA = not os.environ.get("OPTION_PRICING_NO_NUMBA")
+    # Streamlit calls the kernels from script threads; prefer OpenMP, which is safe for
+    # concurrent callers and does not hang at interpreter exit like some TBB builds
+    if "NUMBA_THREADING_LAYER" not in os.environ:
+        numba.config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+except ImportError:
+    numba = None
+    HAS_NUMBA = False
+
+# Lattices smaller than this are rolled back serially; thread start-up costs more than it saves
+PARALLEL_MIN_NODES = 2000
+
+
+# Binomial lattice rollback (pure NumPy)
+def _binomial_lattice_numpy(S: float, X: float, T: float, r: float, sigma: float, N: int,
+                            is_call: bool, american: bool) -> float:
+    dt = T / N
+    u = np.exp(sigma * np.sqrt(dt))  # Upward movement factor
+    d = 1 / u  # Downward movement factor
+    p = (np.exp(r * dt) - d) / (u - d)  # Probability of upward movement
+    disc = np.exp(-r * dt)
+
+    # Scalar power tables keep node prices bit-identical to the compiled kernel
+    pow_u = np.array([u ** float(k) for k in range(N + 1)])
+    pow_d = np.array([d ** float(k) for k in range(N + 1)])
+
+    # Option values at maturity
+    prices = S * pow_u[::-1] * pow_d
+    values = np.maximum(prices - X, 0.0) if is_call else np.maximum(X - prices, 0.0)
+
+    # Step backward through the tree
+    for j in range(N - 1, -1, -1):
+        values = disc * (p * values[:j + 1] + (1 - p) * values[1:j + 2])
+        if american:
+            prices = S * pow_u[j::-1] * pow_d[:j + 1]
+            exercise = np.maximum(prices - X, 0.0) if is_call else np.maximum(X - prices, 0.0)
+            values = np.maximum(values, exercise)
+
+    return float(values[0])
+
+
+# Sum of GBM terminal payoffs per sweep point (pure NumPy)
+def _gbm_payoff_sums_numpy(S: np.ndarray, X: np.ndarray, drift: np.ndarray, vol: np.ndarray,
+                           z: np.ndarray, is_call: bool) -> np.ndarray:
+    ST = S[:, None] * np.exp(drift[:, None] + vol[:, None] * z[None, :])
+    payoffs = np.maximum(ST - X[:, None], 0.0) if is_call else np.maximum(X[:, None] - ST, 0.0)
+    return payoffs.sum(axis=1)
+
+
+if HAS_NUMBA:
+    def _binomial_lattice_kernel(S, X, T, r, sigma, N, is_call, american):
+        dt = T / N
+        u = np.exp(sigma * np.sqrt(dt))
+        d = 1 / u
+        p = (np.exp(r * dt) - d) / (u - d)
+        disc = np.exp(-r * dt)
+
+        pow_u = np.empty(N + 1)
+        pow_d = np.empty(N + 1)
+        for k in range(N + 1):
+            pow_u[k] = u ** float(k)
+            pow_d[k] = d ** float(k)
+
+        values = np.empty(N + 1)
+        scratch = np.empty(N + 1)
+        for i in numba.prange(N + 1):
+            price = S * pow_u[N - i] * pow_d[i]
+            values[i] = max(price - X, 0.0) if is_call else max(X - price, 0.0)
+
+        # Double-buffered so the nodes of one step can be filled in parallel
+        for j in range(N - 1, -1, -1):
+            for i in numba.prange(j + 1):
+                value = disc * (p * values[i] + (1 - p) * values[i + 1])
+                if american:
+                    price = S * pow_u[j - i] * pow_d[i]
+                    exercise = max(price - X, 0.0) if is_call else max(X - price, 0.0)
+                    value = max(value, exercise)
+                scratch[i] = value
+            values, scratch = scratch, values
+
+        return values[0]
+
+    def _gbm_payoff_sums_kernel(S, X, drift, vol, z, is_call):
+        sums = np.zeros(S.shape[0])
+        for k in numba.prange(S.shape[0]):
+            total = 0.0
+            for n in range(z.shape[0]):
+                ST = S[k] * np.exp(drift[k] + vol[k] * z[n])
+                total += max(ST - X[k], 0.0) if is_call else max(X[k] - ST, 0.0)
+            sums[k] = total
+        return sums
+
+    _binomial_lattice_serial = numba.njit(cache=True)(_binomial_lattice_kernel)
+    _binomial_lattice_parallel = numba.njit(cache=True, parallel=True)(_binomial_lattice_kernel)
+    _gbm_payoff_sums_parallel = numba.njit(cache=True, parallel=True)(_gbm_payoff_sums_kernel)
+
+
+# Binomial lattice rollback, dispatched to the compiled kernel when available
+def binomial_lattice(S: float, X: float, T: float, r: float, sigma: float, N: int,
+                     is_call: bool = True, american: bool = False) -> float:
+    """
+    Roll a Cox-Ross-Rubinstein lattice back to the root node.
+
+    Parameters:
+    - S: Stock price (float)
+    - X: Strike price (float)
+    - T: Time to maturity in years (float)
+    - r: Risk-free interest rate (float)
+    - sigma: Volatility (float)
+    - N: Number of time steps (int)
+    - is_call: True for a call, False for a put (bool)
+    - american: Allow early exercise at every node (bool)
+
+    Returns:
+    - The option price (float).
+    """
+    args = (float(S), float(X), float(T), float(r), float(sigma), int(N), bool(is_call), bool(american))
+    if not HAS_NUMBA:
+        return _binomial_lattice_numpy(*args)
+    if N + 1 >= PARALLEL_MIN_NODES:
+        return float(_binomial_lattice_parallel(*args))
+    return float(_binomial_lattice_serial(*args))
+
+
+# Sum of GBM terminal payoffs per sweep point, dispatched to the compiled kernel when available
+def gbm_payoff_sums(S: np.ndarray, X: np.ndarray, drift: np.ndarray, vol: np.ndarray,
+                    z: np.ndarray, is_call: bool = True) -> np.ndarray:
+    """
+    Sum the terminal payoffs S * exp(drift + vol * z) of each sweep point over a batch of normals.
+
+    Parameters:
+    - S, X, drift, vol: Per-point spot, strike, log drift and log volatility (1-D arrays of equal length)
+    - z: Standard normal draws shared by all points (1-D array)
+    - is_call: True for a call, False for a put (bool)
+
+    Returns:
+    - The undiscounted payoff sum of each point (np.ndarray).
+    """
+    S, X, drift, vol, z = (np.ascontiguousarray(a, dtype=np.float64) for a in (S, X, drift, vol, z))
+    if HAS_NUMBA:
+        return _gbm_payoff_sums_parallel(S, X, drift, vol, z, bool(is_call))
+    return _gbm_payoff_sums_numpy(S, X, drift, vol, z, is_call)
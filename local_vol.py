@@ -0,0 +1,192 @@
+import numpy as np
+from scipy.interpolate import PchipInterpolator, make_smoothing_spline
+
+# Bounds on the local volatility stored in the table
+MIN_LOCAL_VOL = 0.01
+MAX_LOCAL_VOL = 5.0
+
+
+# Dupire local volatility on a uniform (time, forward log-moneyness) grid
+class LocalVolSurface:
+    """
+    Precomputed local-volatility table on a uniform grid.
+
+    The table is indexed by time and by forward log-moneyness
+    y = log(S_t / F(t)), with F(t) = S * exp(r * t). Both axes are uniform,
+    so a lookup needs index arithmetic and no search. Lookups outside the
+    grid use the nearest edge value.
+
+    Parameters:
+    - spot: Spot price the surface was built at (float)
+    - r: Risk-free interest rate the surface was built with (float)
+    - times: Uniform time grid in years, starting at 0 (array of M)
+    - log_moneyness: Uniform forward log-moneyness grid (array of N)
+    - local_vol: Local volatility at each grid point (M x N array)
+    - arbitrage: Counts of the arbitrage violations repaired while building the surface (dict)
+    """
+
+    def __init__(self, spot: float, r: float, times, log_moneyness, local_vol, arbitrage: dict = None):
+        self.spot = float(spot)
+        self.r = float(r)
+        self.times = np.asarray(times, dtype=float)
+        self.log_moneyness = np.asarray(log_moneyness, dtype=float)
+        self.local_vol = np.asarray(local_vol, dtype=float)
+        self.arbitrage = {} if arbitrage is None else arbitrage
+
+        self.t0 = self.times[0]
+        self.inv_dt = (self.times.size - 1) / (self.times[-1] - self.times[0])
+        self.y0 = self.log_moneyness[0]
+        self.inv_dy = (self.log_moneyness.size - 1) / (self.log_moneyness[-1] - self.log_moneyness[0])
+        self.y_max_index = self.log_moneyness.size - 1 - 1e-9
+
+    def row(self, t: float):
+        """
+        Local volatility across moneyness at time t, with its slope between grid points.
+
+        Parameters:
+        - t: Time in years (float)
+
+        Returns:
+        - (values, slopes): values at the moneyness nodes and their forward differences (np.ndarray, np.ndarray).
+        """
+        position = min(max((t - self.t0) * self.inv_dt, 0.0), self.times.size - 1.0)
+        i = min(int(position), self.times.size - 2)
+        weight = position - i
+        values = (1.0 - weight) * self.local_vol[i] + weight * self.local_vol[i + 1]
+        return values, np.append(np.diff(values), 0.0)
+
+    def lookup(self, values: np.ndarray, slopes: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        Interpolate a row from `row` at the forward log-moneyness of every path.
+
+        Parameters:
+        - values, slopes: A row of the table as returned by `row`
+        - y: Forward log-moneyness of each path (np.ndarray)
+
+        Returns:
+        - The local volatility of each path (np.ndarray).
+        """
+        position = (y - self.y0) * self.inv_dy
+        np.clip(position, 0.0, self.y_max_index, out=position)
+        j = position.astype(np.intp)
+        position -= j
+        return values[j] + position * slopes[j]
+
+    def __call__(self, t, S) -> np.ndarray:
+        """
+        Local volatility at times t and prices S.
+
+        Parameters:
+        - t: Time in years (float or array)
+        - S: Price of the underlying (float or array)
+
+        Returns:
+        - The local volatility (np.ndarray).
+        """
+        t, S = np.broadcast_arrays(np.asarray(t, dtype=float), np.asarray(S, dtype=float))
+        y = np.log(S / self.spot) - self.r * t
+        time_position = np.clip((t - self.t0) * self.inv_dt, 0.0, self.times.size - 1.0)
+        i = np.minimum(time_position.astype(np.intp), self.times.size - 2)
+        weight = time_position - i
+        position = np.clip((y - self.y0) * self.inv_dy, 0.0, self.y_max_index)
+        j = position.astype(np.intp)
+        frac = position - j
+        table = self.local_vol
+        lower = table[i, j] + frac * (table[i, j + 1] - table[i, j])
+        upper = table[i + 1, j] + frac * (table[i + 1, j + 1] - table[i + 1, j])
+        return (1.0 - weight) * lower + weight * upper
+
+
+# Gatheral's butterfly density term g(y); negative values signal butterfly arbitrage
+def _butterfly_g(y: np.ndarray, w: np.ndarray, dw: np.ndarray, d2w: np.ndarray) -> np.ndarray:
+    return (1.0 - 0.5 * y * dw / w) ** 2 - 0.25 * dw ** 2 * (0.25 + 1.0 / w) + 0.5 * d2w
+
+
+# Build a Dupire local-volatility surface from an implied-volatility grid
+def build_local_vol_surface(S: float, r: float, maturities, strikes, implied_vols, n_times: int = 100,
+                            n_moneyness: int = 201, smoothing: float = None) -> LocalVolSurface:
+    """
+    Build a smoothed, arbitrage-checked Dupire local-volatility table.
+
+    Each maturity's quotes are converted to total implied variance
+    w = sigma^2 T against forward log-moneyness y = log(K / F(T)). A
+    smoothing spline is then fitted per maturity and continued linearly
+    beyond the quoted strikes, with wing slopes clipped to Lee's bounds. Calendar arbitrage, where w falls
+    with T at fixed y, is repaired by taking the running maximum over
+    maturities. w is then interpolated in time with a monotone cubic, so no
+    calendar arbitrage is reintroduced between maturities. The local
+    variance follows from Gatheral's form of Dupire's equation,
+    sigma_loc^2 = dw/dT / g(y), with g the butterfly term. Points where g
+    is not positive are counted as butterfly violations and floored. The
+    result is clipped to [MIN_LOCAL_VOL, MAX_LOCAL_VOL].
+
+    Parameters:
+    - S: Stock price (float)
+    - r: Risk-free interest rate (float)
+    - maturities: Quoted maturities in years, increasing (array of M)
+    - strikes: Quoted strikes (array of K, or M x K for strikes per maturity)
+    - implied_vols: Black implied volatilities, NaN for missing quotes; maturities with no quotes are skipped (M x K array)
+    - n_times: Number of time nodes in the table (int)
+    - n_moneyness: Number of moneyness nodes in the table (int)
+    - smoothing: Smoothing spline penalty, chosen by generalized cross-validation when None (float)
+
+    Returns:
+    - The local-volatility surface (LocalVolSurface).
+    """
+    maturities = np.asarray(maturities, dtype=float)
+    implied_vols = np.atleast_2d(np.asarray(implied_vols, dtype=float))
+    strikes = np.broadcast_to(np.asarray(strikes, dtype=float), implied_vols.shape)
+    log_moneyness = np.log(strikes / S) - r * maturities[:, None]
+
+    quoted = np.isfinite(implied_vols)
+    # Maturities without a single quote carry no smile; leave them out
+    keep = quoted.any(axis=1)
+    if not keep.any():
+        raise ValueError("implied_vols has no finite quotes")
+    maturities, implied_vols, log_moneyness, quoted = maturities[keep], implied_vols[keep], log_moneyness[keep], quoted[keep]
+    y_grid = np.linspace(log_moneyness[quoted].min(), log_moneyness[quoted].max(), n_moneyness)
+
+    # Smoothed total variance of every maturity on the common moneyness grid
+    w = np.empty((maturities.size, n_moneyness))
+    for m, T in enumerate(maturities):
+        order = np.argsort(log_moneyness[m][quoted[m]])
+        y_quotes = log_moneyness[m][quoted[m]][order]
+        w_quotes = implied_vols[m][quoted[m]][order] ** 2 * T
+        if y_quotes.size >= 5:
+            fit = make_smoothing_spline(y_quotes, w_quotes, lam=smoothing)
+            edges, edge_slopes = fit(y_quotes[[0, -1]]), fit.derivative()(y_quotes[[0, -1]])
+        else:
+            fit = lambda y: np.interp(y, y_quotes, w_quotes)
+            edges = w_quotes[[0, -1]]
+            edge_slopes = np.diff(w_quotes)[[0, -1]] / np.diff(y_quotes)[[0, -1]] if y_quotes.size > 1 else np.zeros(2)
+        # Linear wings in total variance, with slopes within Lee's moment bounds [0, 2]
+        left_slope, right_slope = np.clip(edge_slopes[0], -2.0, 0.0), np.clip(edge_slopes[1], 0.0, 2.0)
+        w[m] = np.where(y_grid < y_quotes[0], edges[0] + left_slope * (y_grid - y_quotes[0]),
+                        np.where(y_grid > y_quotes[-1], edges[1] + right_slope * (y_grid - y_quotes[-1]),
+                                 fit(np.clip(y_grid, y_quotes[0], y_quotes[-1]))))
+        w[m] = np.maximum(w[m], 1e-12)
+
+    # Calendar repair: total variance non-decreasing in maturity at fixed moneyness
+    repaired = np.maximum.accumulate(w, axis=0)
+    calendar_violations = int(np.count_nonzero(repaired > w))
+    w = repaired
+
+    # Monotone interpolation in time from w(0) = 0, evaluated on the uniform table grid
+    times = np.linspace(0.0, maturities[-1], n_times)
+    in_time = PchipInterpolator(np.concatenate([[0.0], maturities]), np.vstack([np.zeros(n_moneyness), w]), axis=0)
+    w_grid = np.maximum(in_time(times), 1e-12)
+    dw_dt = np.maximum(in_time(times, 1), 0.0)
+
+    # Dupire in total variance: sigma_loc^2 = dw/dT / g(y)
+    dy = y_grid[1] - y_grid[0]
+    dw_dy = np.gradient(w_grid, dy, axis=1)
+    d2w_dy2 = np.gradient(dw_dy, dy, axis=1)
+    g = _butterfly_g(y_grid, w_grid, dw_dy, d2w_dy2)
+    butterfly_violations = int(np.count_nonzero(g[1:] <= 0.0))  # t = 0 has w = 0 and no smile
+    local_variance = dw_dt / np.maximum(g, 1e-6)
+    local_vol = np.clip(np.sqrt(local_variance), MIN_LOCAL_VOL, MAX_LOCAL_VOL)
+
+    # At t = 0 the total variance carries no smile; use the first time step's row
+    local_vol[0] = local_vol[1]
+    arbitrage = {'calendar_violations': calendar_violations, 'butterfly_violations': butterfly_violations}
+    return LocalVolSurface(S, r, times, y_grid, local_vol, arbitrage)
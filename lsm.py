@@ -0,0 +1,230 @@
+import numpy as np
+from black_scholes import black_scholes
+
+
+# Regression basis evaluated on moneyness x = S / X
+def regression_basis(x: np.ndarray, degree: int = 3, basis: str = 'laguerre') -> np.ndarray:
+    """
+    Evaluate a regression basis for the continuation value.
+
+    Parameters:
+    - x: Moneyness S / X of each path (1-D array)
+    - degree: Highest basis order (int)
+    - basis: 'polynomial' (1, x, x^2, ...) or 'laguerre' (weighted Laguerre polynomials) (str)
+
+    Returns:
+    - The design matrix with degree + 1 columns (np.ndarray).
+    """
+    columns = np.empty((x.size, degree + 1))
+    if basis == 'polynomial':
+        columns[:, 0] = 1.0
+        for k in range(1, degree + 1):
+            columns[:, k] = columns[:, k - 1] * x
+        return columns
+    if basis != 'laguerre':
+        raise ValueError(f"basis must be 'polynomial' or 'laguerre', got {basis!r}")
+
+    # L_{k+1} = ((2k + 1 - x) L_k - k L_{k-1}) / (k + 1), weighted by exp(-x / 2)
+    columns[:, 0] = 1.0
+    if degree >= 1:
+        columns[:, 1] = 1.0 - x
+    for k in range(1, degree):
+        columns[:, k + 1] = ((2 * k + 1 - x) * columns[:, k] - k * columns[:, k - 1]) / (k + 1)
+    return columns * np.exp(-0.5 * x)[:, None]
+
+
+# GBM paths generated backward in time, from maturity to the first exercise date
+def _backward_paths(S: float, T: float, r: float, sigma: float, n_steps: int, n_paths: int,
+                    rng: np.random.RandomState, path_generation: str):
+    dt = T / n_steps
+    drift = r - 0.5 * sigma ** 2
+    if path_generation == 'store':
+        # Whole path matrix kept as float32 to halve its memory, filled one step at a time
+        # from a float64 running slice so no full-size float64 temporary is created
+        paths = np.empty((n_steps, n_paths), dtype=np.float32)
+        W = np.zeros(n_paths)
+        for k in range(1, n_steps + 1):
+            W += np.sqrt(dt) * rng.normal(size=n_paths)
+            paths[k - 1] = S * np.exp(drift * k * dt + sigma * W)
+        for k in range(n_steps, 0, -1):
+            yield k, paths[k - 1].astype(np.float64)
+    elif path_generation == 'bridge':
+        # Brownian bridge: W(t_{k-1}) | W(t_k) ~ N(W(t_k) t_{k-1} / t_k, dt t_{k-1} / t_k), so only one time slice is held
+        W = np.sqrt(T) * rng.normal(size=n_paths)
+        for k in range(n_steps, 0, -1):
+            yield k, S * np.exp(drift * k * dt + sigma * W)
+            if k > 1:
+                W = W * (k - 1) / k + np.sqrt(dt * (k - 1) / k) * rng.normal(size=n_paths)
+    else:
+        raise ValueError(f"path_generation must be 'store' or 'bridge', got {path_generation!r}")
+
+
+# Intrinsic value of the option
+def _exercise_value(S: np.ndarray, X: float, option_type: str) -> np.ndarray:
+    return np.maximum(S - X, 0.0) if option_type == 'call' else np.maximum(X - S, 0.0)
+
+
+# Backward induction over one set of paths, fitting or applying the regression coefficients
+def _lsm_backward(paths, payoff, features, disc: float, value_basis=None, coefficients: dict = None):
+    fit = coefficients is None
+    coefficients = {} if fit else coefficients
+    value_coefficients = {}
+    cash = None
+    for k, S_k in paths:
+        exercise = payoff(S_k)
+        if cash is None:
+            cash = exercise
+            continue
+        cash *= disc  # Value at t_k of the cash flow realised later on the path
+        itm = np.flatnonzero(exercise > 0)
+        if not itm.size:
+            continue
+        design = features(S_k[itm])
+        if fit and itm.size > design.shape[1]:
+            coefficients[k] = np.linalg.lstsq(design, cash[itm], rcond=None)[0]
+            if value_basis is not None:
+                # Continuation fitted on every path, used as the value function for the upper bound
+                value_coefficients[k] = np.linalg.lstsq(value_basis(k, S_k), cash, rcond=None)[0]
+        if k in coefficients:
+            continuation = design @ coefficients[k]
+            exercise_now = itm[exercise[itm] > continuation]
+            cash[exercise_now] = exercise[exercise_now]
+    return cash * disc, coefficients, value_coefficients
+
+
+# Longstaff-Schwartz least-squares Monte Carlo for American options
+def lsm_american_option_pricing(S: float, X: float, T: float, r: float, sigma: float,
+                                n_steps: int = 50, iterations: int = 100000, option_type: str = 'put',
+                                degree: int = 3, basis: str = 'laguerre', path_generation: str = 'bridge',
+                                upper_paths: int = 2000, inner_paths: int = 100, seed: int = 42,
+                                paths=None, payoff=None, features=None) -> dict:
+    """
+    Longstaff-Schwartz least-squares Monte Carlo for Bermudan/American options.
+
+    Continuation values are regressed on the basis at each exercise date
+    using in-the-money paths only. The regression is fitted on one set of
+    paths and applied to an independent set, which gives a low-biased price.
+    An Andersen-Broadie dual estimate on a further set of paths gives the
+    high-biased bound. Its martingale comes from a value function fitted on
+    all paths, with the European price as an extra regressor. One-step
+    nested simulation estimates the martingale, using antithetic draws and
+    the European price as a control variate.
+
+    Paths are either stored as a float32 matrix ('store') or regenerated
+    backward in time with a Brownian bridge ('bridge'), which keeps only one
+    time slice in memory.
+
+    By default the underlying is a single GBM asset and the payoff a vanilla
+    call or put. For a single asset the binomial lattice with american=True
+    is the faster engine. Other models and payoffs plug in through `paths`,
+    `payoff` and `features`, e.g. multi_asset.correlated_backward_paths for
+    basket or max options. The dual upper bound needs one-step simulation
+    and a European price under the model, so it is only computed for the
+    built-in GBM paths and payoff; otherwise 'upper' is NaN.
+
+    Parameters:
+    - S: Stock price (float)
+    - X: Strike price (float)
+    - T: Time to maturity in years (float)
+    - r: Risk-free interest rate (float)
+    - sigma: Volatility (float)
+    - n_steps: Number of exercise dates (int)
+    - iterations: Number of paths for the regression and for the lower bound (int)
+    - option_type: 'call' or 'put' (str)
+    - degree: Highest basis order (int)
+    - basis: 'laguerre' or 'polynomial' (str)
+    - path_generation: 'bridge' or 'store' (str)
+    - upper_paths: Number of outer paths for the upper bound, 0 to skip it (int)
+    - inner_paths: Number of one-step nested paths per outer path and date (int)
+    - seed: Random seed (int)
+    - paths: Callable (n_paths, rng) yielding (k, state) for k = n_steps .. 1, where state is the
+      (n_paths,) or (n_paths, d) model state at t_k; S is then the initial state and sigma is unused
+    - payoff: Callable mapping states to exercise values, the call/put on X by default
+    - features: Callable mapping in-the-money states to the regression design matrix; by default
+      the basis of each asset's S / X, plus the payoff for more than one asset
+
+    Returns:
+    - A dict with 'price' (the lower bound), 'lower', 'lower_std_error', 'upper', 'upper_std_error' and 'in_sample'.
+    """
+    rng = np.random.RandomState(seed)
+    dt = T / n_steps
+    disc = np.exp(-r * dt)
+    custom = paths is not None or payoff is not None or features is not None
+    if payoff is None:
+        payoff = lambda state: _exercise_value(state, X, option_type)
+    if features is None:
+        def features(state):
+            if state.ndim == 1:
+                return regression_basis(state / X, degree, basis)
+            return np.column_stack([regression_basis(state[:, j] / X, degree, basis) for j in range(state.shape[1])]
+                                   + [payoff(state) / X])
+    if paths is None:
+        paths = lambda n_paths, rng: _backward_paths(S, T, r, sigma, n_steps, n_paths, rng, path_generation)
+    exercise_now = float(payoff(np.asarray(S, dtype=float)[None, ...])[0])
+
+    # Value-function basis: the exercise basis plus the European price for the remaining life
+    def value_basis(k, S_k):
+        european = black_scholes(S_k, X, T - k * dt, r, sigma, option_type)
+        return np.column_stack([regression_basis(S_k / X, degree, basis), european / X])
+
+    # Fit the exercise policy on one set of paths
+    fit_upper = upper_paths > 0 and not custom
+    cash, coefficients, value_coefficients = _lsm_backward(paths(iterations, rng), payoff, features, disc,
+                                                           value_basis if fit_upper else None)
+    in_sample = max(exercise_now, cash.mean())
+
+    # Apply it to independent paths for a low-biased estimate
+    cash, _, _ = _lsm_backward(paths(iterations, rng), payoff, features, disc, coefficients=coefficients)
+    lower = max(exercise_now, cash.mean())
+    lower_std_error = cash.std(ddof=1) / np.sqrt(cash.size)
+
+    result = {
+        'price': float(lower),
+        'lower': float(lower),
+        'lower_std_error': float(lower_std_error),
+        'upper': float('nan'),
+        'upper_std_error': float('nan'),
+        'in_sample': float(in_sample),
+    }
+    if not fit_upper:
+        return result
+
+    # Discounted approximate value function: exercise value where the policy exercises,
+    # otherwise the continuation fitted on all paths
+    def value(k, S_k):
+        exercise = _exercise_value(S_k, X, option_type)
+        if k < n_steps and k in coefficients:
+            x = S_k.ravel() / X
+            continuation = (value_basis(k, S_k.ravel()) @ value_coefficients[k]).reshape(S_k.shape)
+            policy = (regression_basis(x, degree, basis) @ coefficients[k]).reshape(S_k.shape)
+            exercise = np.where((exercise > 0) & (exercise > policy), exercise, continuation)
+        return np.exp(-r * k * dt) * exercise
+
+    # Discounted European value for the remaining life; a martingale, so its one-step mean is known exactly
+    def european(k, S_k):
+        if k == n_steps:
+            return np.exp(-r * T) * _exercise_value(S_k, X, option_type)
+        return np.exp(-r * k * dt) * black_scholes(S_k, X, T - k * dt, r, sigma, option_type)
+
+    # Martingale increment from t_k to t_{k+1}: nested one-step estimate of E_k[V_{k+1}] with
+    # antithetic draws and the European value as an exact control variate
+    drift = (r - 0.5 * sigma ** 2) * dt
+    vol = sigma * np.sqrt(dt)
+
+    def martingale_step(k, S_k, S_next):
+        z = rng.normal(size=(upper_paths, (inner_paths + 1) // 2))
+        inner = S_k[:, None] * np.exp(drift + vol * np.hstack([z, -z]))
+        expected = (value(k + 1, inner) - european(k + 1, inner)).mean(axis=1) + european(k, S_k)
+        return value(k + 1, S_next) - expected
+
+    # Dual recursion D_k = max(h_k, D_{k+1} - dM_{k+1}), run backward along the paths
+    D, S_next = None, None
+    for k, S_k in _backward_paths(S, T, r, sigma, n_steps, upper_paths, rng, path_generation):
+        discounted_exercise = np.exp(-r * k * dt) * _exercise_value(S_k, X, option_type)
+        D = discounted_exercise if D is None else np.maximum(discounted_exercise, D - martingale_step(k, S_k, S_next))
+        S_next = S_k
+    D = np.maximum(exercise_now, D - martingale_step(0, np.full(upper_paths, float(S)), S_next))
+
+    result['upper'] = float(D.mean())
+    result['upper_std_error'] = float(D.std(ddof=1) / np.sqrt(D.size))
+    return result
@@ -1,8 +1,107 @@
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.stats import norm
 import streamlit as st
-import plotly.graph_objects as go
+from kernels import gbm_payoff_sums
+from result_store import cached_call
+from autotune import tuned_setting
+from page_fragments import price_panel, sweep_panel
+
+# Running Welford/Chan statistics for a batch of discounted payoffs
+def _merge_batch_stats(count: int, mean: float, m2: float, batch: np.ndarray):
+    """
+    Merge a batch of samples into running (count, mean, M2) statistics.
+
+    Uses Chan's parallel form of Welford's algorithm so that batches of any
+    size can be combined without keeping the individual samples around.
+    """
+    n_b = batch.size
+    if n_b == 0:
+        return count, mean, m2
+    mean_b = float(np.mean(batch))
+    m2_b = float(np.sum((batch - mean_b) ** 2))
+    total = count + n_b
+    delta = mean_b - mean
+    mean = mean + delta * n_b / total
+    m2 = m2 + m2_b + delta ** 2 * count * n_b / total
+    return total, mean, m2
+
+# Monte Carlo option pricing with error estimates and optional early stopping
+def monte_carlo_option_pricing_stats(S: float, X: float, T: float, r: float, sigma: float, iterations: int,
+                                     option_type: str = 'call', batch_size: int = 10000,
+                                     abs_tol: float = None, rel_tol: float = None, max_time: float = None,
+                                     confidence: float = 0.95, seed: int = 42) -> dict:
+    """
+    Monte Carlo option pricing with a standard error and confidence interval.
+
+    Paths are drawn in batches of `batch_size` and folded into running
+    Welford statistics. Without a tolerance exactly `iterations` paths are
+    used. When `abs_tol` or `rel_tol` is given, batches are drawn until the
+    confidence half-width falls below the tolerance, with `iterations` acting
+    as the path budget and `max_time` (seconds) as an optional time budget.
+
+    Parameters:
+    - S: Stock price (float)
+    - X: Strike price (float)
+    - T: Time to maturity in years (float)
+    - r: Risk-free interest rate (float)
+    - sigma: Volatility (float)
+    - iterations: Number of Monte Carlo iterations, or the path budget in tolerance mode (int)
+    - option_type: 'call' or 'put' (str)
+    - batch_size: Number of paths drawn per batch (int)
+    - abs_tol: Target absolute half-width of the confidence interval (float)
+    - rel_tol: Target half-width relative to the price (float)
+    - max_time: Wall-clock budget in seconds (float)
+    - confidence: Confidence level of the interval (float)
+    - seed: Random seed (int)
+
+    Returns:
+    - A dict with 'price', 'std_error', 'ci_low', 'ci_high', 'paths' and 'converged'.
+      'converged' is True when the tolerance was met, or without a tolerance
+      when all `iterations` paths were used.
+    """
+    rng = np.random.RandomState(seed)
+    iterations = int(iterations)
+    batch_size = max(1, int(batch_size))
+    z_score = norm.ppf(0.5 + 0.5 * confidence)
+    adaptive = abs_tol is not None or rel_tol is not None
+    drift = (r - 0.5 * sigma ** 2) * T
+    vol = sigma * np.sqrt(T)
+    discount = np.exp(-r * T)
+
+    count, mean, m2 = 0, 0.0, 0.0
+    converged = False
+    start = time.perf_counter()
+    while count < iterations:
+        n = min(batch_size, iterations - count)
+        ST = S * np.exp(drift + vol * rng.normal(size=n))
+        if option_type == 'call':
+            payoffs = np.maximum(ST - X, 0.0)
+        else:
+            payoffs = np.maximum(X - ST, 0.0)
+        count, mean, m2 = _merge_batch_stats(count, mean, m2, discount * payoffs)
+
+        if adaptive and count > 1:
+            half_width = z_score * np.sqrt(m2 / (count - 1) / count)
+            if (abs_tol is not None and half_width <= abs_tol) or \
+                    (rel_tol is not None and half_width <= rel_tol * abs(mean)):
+                converged = True
+                break
+        if max_time is not None and time.perf_counter() - start >= max_time:
+            break
+    if not adaptive:
+        converged = count == iterations  # False when max_time cut the run short
+
+    std_error = float(np.sqrt(m2 / (count - 1) / count)) if count > 1 else float('nan')
+    return {
+        'price': mean,
+        'std_error': std_error,
+        'ci_low': mean - z_score * std_error,
+        'ci_high': mean + z_score * std_error,
+        'paths': count,
+        'converged': converged,
+    }
 
 # Monte Carlo option pricing function
 def monte_carlo_option_pricing(S: float, X: float, T: float, r: float, sigma: float, iterations: int, option_type: str = 'call') -> float:
@@ -21,15 +120,156 @@ def monte_carlo_option_pricing(S: float, X: float, T: float, r: float, sigma: fl
     Returns:
     - The option price (float).
     """
-    np.random.seed(42)  # For reproducibility
-    payoffs = []
-    for _ in range(iterations):
-        ST = S * np.exp((r - 0.5 * sigma ** 2) * T + sigma * np.sqrt(T) * np.random.normal())
+    return monte_carlo_option_pricing_stats(S, X, T, r, sigma, iterations, option_type)['price']
+
+# Monte Carlo pricing of a whole parameter sweep from one set of draws
+def monte_carlo_sweep(S, X, T, r, sigma, iterations: int, option_type: str = 'call',
+                      batch_size: int = 10000, seed: int = 42) -> np.ndarray:
+    """
+    Price every point of a parameter sweep against common random numbers.
+
+    Any of S, X, T, r and sigma may be an array; they are broadcast against
+    each other and each batch of standard normals is drawn once and reused
+    for every sweep point. This gives noise-consistent curves and matches
+    calling monte_carlo_option_pricing once per point with the same seed.
+
+    Parameters:
+    - S: Stock price (float or array)
+    - X: Strike price (float or array)
+    - T: Time to maturity in years (float or array)
+    - r: Risk-free interest rate (float or array)
+    - sigma: Volatility (float or array)
+    - iterations: Number of Monte Carlo iterations (int)
+    - option_type: 'call' or 'put' (str)
+    - batch_size: Number of paths drawn per batch (int)
+    - seed: Random seed (int)
+
+    Returns:
+    - Option prices with the broadcast shape of the inputs (np.ndarray).
+    """
+    S, X, T, r, sigma = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (S, X, T, r, sigma)))
+    shape = S.shape
+    S, X, T, r, sigma = (a.ravel() for a in (S, X, T, r, sigma))
+
+    rng = np.random.RandomState(seed)
+    iterations = int(iterations)
+    batch_size = max(1, int(batch_size))
+    drift = (r - 0.5 * sigma ** 2) * T
+    vol = sigma * np.sqrt(T)
+
+    payoff_sums = np.zeros(S.shape[0])
+    drawn = 0
+    while drawn < iterations:
+        n = min(batch_size, iterations - drawn)
+        payoff_sums += gbm_payoff_sums(S, X, drift, vol, rng.normal(size=n), option_type == 'call')
+        drawn += n
+
+    prices = np.exp(-r * T) * payoff_sums / iterations
+    return prices.reshape(shape)
+
+# Monte Carlo option pricing under a Dupire local-volatility surface
+def local_vol_monte_carlo(S: float, X: float, T: float, r: float, surface, iterations: int,
+                          option_type: str = 'call', n_steps: int = None, batch_size: int = 10000,
+                          confidence: float = 0.95, seed: int = 42) -> dict:
+    """
+    Monte Carlo option pricing with volatility looked up from a local-volatility surface.
+
+    Paths are simulated as forward log-moneyness y = log(S_t / F(t)) with
+    log-Euler steps, so the drift is -sigma^2 / 2 and the rate only enters
+    through the forward. At each step the surface row for that time is
+    blended once, and every path's volatility is one index computation and
+    a linear interpolation on that row. The surface is used in sticky
+    moneyness: y is measured against the forward of `S`.
+
+    The forward is matched exactly at any step size, but the smile carries a
+    first-order time-discretization bias. With a steep skew this bias
+    flattens the wings: at 25 steps a year it is about 0.02 on 80/120
+    strikes, a few standard errors at 200k paths. The default of daily steps
+    keeps it to about 0.002.
+
+    Parameters:
+    - S: Stock price (float)
+    - X: Strike price (float)
+    - T: Time to maturity in years (float)
+    - r: Risk-free interest rate (float)
+    - surface: Local-volatility surface (local_vol.LocalVolSurface)
+    - iterations: Number of Monte Carlo iterations (int)
+    - option_type: 'call' or 'put' (str)
+    - n_steps: Number of time steps per path, 252 per year by default (int)
+    - batch_size: Number of paths drawn per batch (int)
+    - confidence: Confidence level of the interval (float)
+    - seed: Random seed (int)
+
+    Returns:
+    - A dict with 'price', 'std_error', 'ci_low', 'ci_high' and 'paths'.
+    """
+    rng = np.random.RandomState(seed)
+    iterations = int(iterations)
+    batch_size = max(1, int(batch_size))
+    z_score = norm.ppf(0.5 + 0.5 * confidence)
+    n_steps = max(1, int(np.ceil(252 * T))) if n_steps is None else int(n_steps)
+    dt = T / n_steps
+    sqrt_dt = np.sqrt(dt)
+    forward = S * np.exp(r * T)
+    discount = np.exp(-r * T)
+    rows = [surface.row(k * dt) for k in range(n_steps)]  # Shared by every batch
+
+    count, mean, m2 = 0, 0.0, 0.0
+    while count < iterations:
+        n = min(batch_size, iterations - count)
+        y = np.zeros(n)
+        for values, slopes in rows:
+            vol = surface.lookup(values, slopes, y)
+            y += vol * (sqrt_dt * rng.normal(size=n) - 0.5 * dt * vol)
+        ST = forward * np.exp(y)
         if option_type == 'call':
-            payoffs.append(max(0, ST - X))
+            payoffs = np.maximum(ST - X, 0.0)
         else:
-            payoffs.append(max(0, X - ST))
-    return np.exp(-r * T) * np.mean(payoffs)
+            payoffs = np.maximum(X - ST, 0.0)
+        count, mean, m2 = _merge_batch_stats(count, mean, m2, discount * payoffs)
+
+    std_error = float(np.sqrt(m2 / (count - 1) / count)) if count > 1 else float('nan')
+    return {
+        'price': mean,
+        'std_error': std_error,
+        'ci_low': mean - z_score * std_error,
+        'ci_high': mean + z_score * std_error,
+        'paths': count,
+    }
+
+# Page computations, cached on their own inputs so unrelated widget changes reuse them
+@st.cache_data(show_spinner=False)
+def _prices(S0, X, T, r, sigma, iterations, abs_tol):
+    # Stops early once the target error is met and reuses results stored by earlier runs. With a
+    # target the error is checked every 1% of the budget (at least every 1,000 paths)
+    batch_size = max(1000, int(iterations) // 100) if abs_tol is not None else 10000
+    notes = []
+    results = []
+    for option_type in ('call', 'put'):
+        result = cached_call(monte_carlo_option_pricing_stats, S0, X, T, r, sigma, iterations, option_type,
+                             batch_size=batch_size, abs_tol=abs_tol)
+        note = f"± {result['std_error']:.4f} (SE, {result['paths']:,} paths)"
+        if abs_tol is not None and not result['converged']:
+            note += ", target not met within the iterations"
+        results.append(result['price'])
+        notes.append(note)
+    return results[0], results[1], notes[0], notes[1]
+
+@st.cache_data(show_spinner=False)
+def _maturity_sweep(S0, X, T, r, sigma, iterations):
+    times = np.linspace(0.01, T, 100)
+    return times, {
+        'Call Option': cached_call(monte_carlo_sweep, S0, X, times, r, sigma, iterations, 'call'),
+        'Put Option': cached_call(monte_carlo_sweep, S0, X, times, r, sigma, iterations, 'put'),
+    }
+
+@st.cache_data(show_spinner=False)
+def _volatility_sweep(S0, X, T, r, iterations):
+    volatilities = np.linspace(0.01, 1.0, 50)
+    return volatilities, {
+        'Call Option': cached_call(monte_carlo_sweep, S0, X, T, r, volatilities, iterations, 'call'),
+        'Put Option': cached_call(monte_carlo_sweep, S0, X, T, r, volatilities, iterations, 'put'),
+    }
 
 # Monte Carlo model page
 def show_monte_carlo_page():
@@ -45,70 +285,49 @@ def show_monte_carlo_page():
         sigma = st.slider("Volatility (σ)", min_value=0.01, max_value=1.0, value=0.2, step=0.01)
         r = st.slider("Risk-Free Rate (r)", min_value=0.0, max_value=0.2, value=0.05, step=0.001)
         iterations = st.number_input("Monte Carlo Iterations", value=10000)
+        auto_iterations = st.checkbox("Choose Iterations for a Price Tolerance", value=False)
+        if auto_iterations:
+            tolerance = st.number_input("Price Tolerance", value=0.05, min_value=0.001, step=0.01, format="%.3f")
+            iterations = tuned_setting('monte_carlo', S0, X, T, r, sigma, tolerance, default=iterations)
+            st.caption(f"Using {iterations:,} iterations, estimated to meet the tolerance (run `python autotune.py` to profile the engines on this machine).")
+        target_error = st.number_input("Target Standard Error (0 = use all iterations)", value=0.0, min_value=0.0, step=0.01, format="%.3f",
+                                       help="Paths are drawn until the standard error reaches the target, up to the iterations above.")
 
         # Add padding between inputs and price boxes
         st.markdown("<div style='padding-top:20px;'></div>", unsafe_allow_html=True)
 
-        # Calculate the call and put option prices
-        call_option_price = monte_carlo_option_pricing(S0, X, T, r, sigma, iterations, 'call')
-        put_option_price = monte_carlo_option_pricing(S0, X, T, r, sigma, iterations, 'put')
-
-        # Display prices in colorful rounded boxes
-        col3, col4 = st.columns(2)
-
-        with col3:
-            st.markdown(
-                f"""
-                <div style="background-color:#E3F2FD; border-radius:10px; padding:15px; text-align:center;">
-                    <span style="font-size:20px; color:blue;"><b>Call Option Price</b></span><br>
-                    <span style="font-size:45px; color:blue;"><b>${call_option_price:.2f}</b></span>
-                </div>
-                """, unsafe_allow_html=True
-            )
-
-        with col4:
-            st.markdown(
-                f"""
-                <div style="background-color:#FFEBEE; border-radius:10px; padding:15px; text-align:center;">
-                    <span style="font-size:20px; color:red;"><b>Put Option Price</b></span><br>
-                    <span style="font-size:45px; color:red;"><b>${put_option_price:.2f}</b></span>
-                </div>
-                """, unsafe_allow_html=True
-            )
-
-    # Graphs placed next to the inputs
+        # Calculate the call and put option prices with their standard errors, stopping early
+        # once the target error is met
+        abs_tol = target_error * norm.ppf(0.975) if target_error > 0 else None
+        price_panel(_prices, dict(S0=S0, X=X, T=T, r=r, sigma=sigma, iterations=iterations, abs_tol=abs_tol))
+        defer = st.toggle("Defer chart updates until Apply", key="monte_carlo_defer")
+
+    # Graphs placed next to the inputs; each chart is its own fragment and only
+    # recomputes when its own inputs change
     with col2:
         # Option price vs. time to maturity (first graph)
-        times = np.linspace(0.01, T, 100)
-        call_prices_over_time = [monte_carlo_option_pricing(S0, X, t, r, sigma, iterations, 'call') for t in times]
-        put_prices_over_time = [monte_carlo_option_pricing(S0, X, t, r, sigma, iterations, 'put') for t in times]
-
-        fig1 = go.Figure()
-        fig1.add_trace(go.Scatter(x=times, y=call_prices_over_time, mode='lines', name='Call Option', line=dict(color='blue')))
-        fig1.add_trace(go.Scatter(x=times, y=put_prices_over_time, mode='lines', name='Put Option', line=dict(color='red')))
-        fig1.update_layout(
-            title="Option Prices vs. Time to Maturity",
-            xaxis_title="Time to Maturity (Years)",
-            yaxis_title="Option Price",
-            height=350  # Increased height for better clarity
+        sweep_panel(
+            "monte_carlo_maturity", _maturity_sweep, dict(S0=S0, X=X, T=T, r=r, sigma=sigma, iterations=iterations),
+            dict(
+                title="Option Prices vs. Time to Maturity",
+                xaxis_title="Time to Maturity (Years)",
+                yaxis_title="Option Price",
+                height=350  # Increased height for better clarity
+            ),
+            deferred=defer
         )
-        st.plotly_chart(fig1)
 
         # Sensitivity Analysis: Option Price vs Volatility (second graph)
-        volatilities = np.linspace(0.01, 1.0, 50)
-        call_prices_vs_volatility = [monte_carlo_option_pricing(S0, X, T, r, vol, iterations, 'call') for vol in volatilities]
-        put_prices_vs_volatility = [monte_carlo_option_pricing(S0, X, T, r, vol, iterations, 'put') for vol in volatilities]
-
-        fig2 = go.Figure()
-        fig2.add_trace(go.Scatter(x=volatilities, y=call_prices_vs_volatility, mode='lines', name='Call Option', line=dict(color='blue')))
-        fig2.add_trace(go.Scatter(x=volatilities, y=put_prices_vs_volatility, mode='lines', name='Put Option', line=dict(color='red')))
-        fig2.update_layout(
-            title="Option Prices vs. Volatility",
-            xaxis_title="Volatility (σ)",
-            yaxis_title="Option Price",
-            height=350  # Increased height for better clarity
+        sweep_panel(
+            "monte_carlo_volatility", _volatility_sweep, dict(S0=S0, X=X, T=T, r=r, iterations=iterations),
+            dict(
+                title="Option Prices vs. Volatility",
+                xaxis_title="Volatility (σ)",
+                yaxis_title="Option Price",
+                height=350  # Increased height for better clarity
+            ),
+            deferred=defer
         )
-        st.plotly_chart(fig2)
 
     # Monte Carlo Formula with LaTeX rendering and explanations on the sides
     col_left, col_center, col_right = st.columns([1, 2, 1])
@@ -0,0 +1,82 @@
+import streamlit as st
+import plotly.graph_objects as go
+
+# Trace colors of the call and put curves on the model pages
+OPTION_COLORS = {'Call Option': 'blue', 'Put Option': 'red'}
+
+
+# Call and put prices in colorful rounded boxes
+def render_price_boxes(call_option_price: float, put_option_price: float, call_note: str = "", put_note: str = ""):
+    col3, col4 = st.columns(2)
+
+    with col3:
+        note = f'<br><span style="font-size:14px; color:blue;">{call_note}</span>' if call_note else ""
+        st.markdown(
+            f"""
+            <div style="background-color:#E3F2FD; border-radius:10px; padding:15px; text-align:center;">
+                <span style="font-size:20px; color:blue;"><b>Call Option Price</b></span><br>
+                <span style="font-size:45px; color:blue;"><b>${call_option_price:.2f}</b></span>{note}
+            </div>
+            """, unsafe_allow_html=True
+        )
+
+    with col4:
+        note = f'<br><span style="font-size:14px; color:red;">{put_note}</span>' if put_note else ""
+        st.markdown(
+            f"""
+            <div style="background-color:#FFEBEE; border-radius:10px; padding:15px; text-align:center;">
+                <span style="font-size:20px; color:red;"><b>Put Option Price</b></span><br>
+                <span style="font-size:45px; color:red;"><b>${put_option_price:.2f}</b></span>{note}
+            </div>
+            """, unsafe_allow_html=True
+        )
+
+
+# Price boxes as an independently rerunning fragment
+@st.fragment
+def price_panel(prices, inputs: dict):
+    """
+    Render the price boxes from `prices(**inputs)`.
+
+    `prices` should be wrapped in st.cache_data and return
+    (call_price, put_price, call_note, put_note), so it only recomputes when
+    its own inputs change.
+    """
+    render_price_boxes(*prices(**inputs))
+
+
+# Sweep chart as an independently rerunning fragment
+@st.fragment
+def sweep_panel(key: str, sweep, inputs: dict, layout: dict, colors: dict = None, deferred: bool = False):
+    """
+    Plot the traces returned by `sweep(**inputs)`.
+
+    `sweep` should be wrapped in st.cache_data and return (x, {trace name:
+    values}), so the chart only recomputes when its own inputs change. When
+    `deferred` is set the chart keeps its last applied inputs until the
+    panel's Apply button is pressed. Only this fragment reruns on Apply.
+
+    Parameters:
+    - key: Unique key of the panel on the page (str)
+    - sweep: Cached sweep function
+    - inputs: Keyword arguments for the sweep (dict)
+    - layout: Plotly layout settings (dict)
+    - colors: Trace name to line color, OPTION_COLORS by default (dict)
+    - deferred: Wait for Apply before recomputing (bool)
+    """
+    colors = OPTION_COLORS if colors is None else colors
+    applied_key = f"{key}_applied_inputs"
+    if not deferred or applied_key not in st.session_state:
+        st.session_state[applied_key] = inputs
+    elif st.button("Apply", key=f"{key}_apply"):
+        st.session_state[applied_key] = inputs
+    applied = st.session_state[applied_key]
+    if applied != inputs:
+        st.caption("Inputs changed since this chart was drawn; press Apply to update it.")
+
+    x, traces = sweep(**applied)
+    fig = go.Figure()
+    for name, values in traces.items():
+        fig.add_trace(go.Scatter(x=x, y=values, mode='lines', name=name, line=dict(color=colors[name])))
+    fig.update_layout(**layout)
+    st.plotly_chart(fig, key=f"{key}_chart")
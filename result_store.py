@@ -0,0 +1,295 @@
+import atexit
+import hashlib
+import importlib
+import inspect
+import json
+import numbers
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+# Location of the shared store; every process pointing at the same file shares results
+DEFAULT_STORE_PATH = os.environ.get("OPTION_PRICING_STORE", ".option_pricing_store.sqlite")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Modules doing the numerical work behind the pricing functions; their source is part of every key
+ENGINE_MODULES = ("kernels",)
+
+# Lookups between writes of the pending counters, and seconds before a hit refreshes an entry's LRU time
+FLUSH_EVERY = 100
+TOUCH_INTERVAL = 60.0
+
+
+# JSON encoding for NumPy scalars and arrays returned by the pricing functions
+def _to_json(value) -> str:
+    def default(obj):
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.generic):
+            return obj.item()
+        raise TypeError(f"Cannot store value of type {type(obj).__name__}")
+    return json.dumps(value, default=default, sort_keys=True)
+
+
+# Stable code version of the modules behind a pricing function
+@lru_cache(maxsize=None)
+def code_version(*module_names: str) -> str:
+    """
+    Hash the source of modules so that cached results are invalidated when any of them changes.
+
+    Parameters:
+    - module_names: Names of importable modules (str)
+
+    Returns:
+    - A hex digest of the combined module sources (str).
+    """
+    digest = hashlib.sha256()
+    for name in module_names:
+        digest.update(name.encode())
+        digest.update(inspect.getsource(importlib.import_module(name)).encode())
+    return digest.hexdigest()[:16]
+
+
+# Key form of an argument: numbers as floats, so 100 and 100.0 share an entry
+def _normalize(value):
+    if isinstance(value, (bool, np.bool_)) or not isinstance(value, (numbers.Real, np.ndarray, list, tuple)):
+        return value
+    if isinstance(value, numbers.Real):
+        return float(value)
+    if isinstance(value, np.ndarray) and value.dtype.kind in "biuf":
+        return value.astype(float).tolist()
+    return [_normalize(v) for v in value]
+
+
+# Stable key for one pricing request
+def make_key(model: str, params: dict, version: str = "") -> str:
+    """
+    Build a stable hash from the model name, its parameters/engine settings and the code version.
+
+    Parameters:
+    - model: Model name (str)
+    - params: Model parameters and engine settings (dict)
+    - version: Code version (str)
+
+    Returns:
+    - A hex digest usable as a store key (str).
+    """
+    payload = _to_json({"model": model, "params": params, "version": version})
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# On-disk result store shared across processes
+class ResultStore:
+    """
+    SQLite-backed result store with a byte-size cap and LRU eviction.
+
+    Each operation opens its own connection, so a store can be shared by
+    threads and by any number of processes using the same file. The database
+    runs in WAL mode, and lookups only read, so concurrent readers never
+    wait for each other or for the writer. Hit and miss counts and LRU
+    access times are collected in memory and written in one transaction
+    every FLUSH_EVERY lookups, on put, on stats and at exit. An entry's
+    access time is only refreshed once it is older than TOUCH_INTERVAL. The
+    counts in the file cover every process that uses it.
+
+    Parameters:
+    - path: SQLite file path (str)
+    - max_bytes: Maximum total size of the stored values in bytes (int)
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._pending = {"hits": 0, "misses": 0, "touched": {}}
+        atexit.register(self.flush)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        finally:
+            conn.close()
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.executemany(
+                "INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)",
+                [("hits",), ("misses",), ("evictions",)],
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self._connect())
+
+    def get(self, key: str):
+        """
+        Look up a stored result and mark it as recently used.
+
+        Returns:
+        - The stored value, or None on a miss.
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT value, last_access FROM results WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+
+        now = time.time()
+        with self._lock:
+            if row is None:
+                self._pending["misses"] += 1
+            else:
+                self._pending["hits"] += 1
+                if now - row[1] > TOUCH_INTERVAL:
+                    self._pending["touched"][key] = now
+            due = self._pending["hits"] + self._pending["misses"] >= FLUSH_EVERY
+        if due:
+            self.flush()
+        return None if row is None else json.loads(row[0])
+
+    def _take_pending(self) -> dict:
+        with self._lock:
+            pending = self._pending
+            self._pending = {"hits": 0, "misses": 0, "touched": {}}
+        return pending
+
+    def _write_pending(self, conn: sqlite3.Connection, pending: dict) -> None:
+        conn.execute("UPDATE counters SET value = value + ? WHERE name = 'hits'", (pending["hits"],))
+        conn.execute("UPDATE counters SET value = value + ? WHERE name = 'misses'", (pending["misses"],))
+        conn.executemany("UPDATE results SET last_access = MAX(last_access, ?) WHERE key = ?",
+                         [(when, key) for key, when in pending["touched"].items()])
+
+    def flush(self) -> None:
+        """
+        Write the pending hit/miss counts and access times to the file.
+        """
+        pending = self._take_pending()
+        if pending["hits"] or pending["misses"] or pending["touched"]:
+            with self._transaction() as conn:
+                self._write_pending(conn, pending)
+
+    def put(self, key: str, value) -> None:
+        """
+        Store a JSON-serialisable result, evicting least recently used entries above the size cap.
+        """
+        payload = _to_json(value)
+        size = len(payload.encode())
+        if size > self.max_bytes:
+            return
+        pending = self._take_pending()
+        with self._transaction() as conn:
+            self._write_pending(conn, pending)
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, payload, size, time.time()),
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total > self.max_bytes:
+                evicted = []
+                for old_key, old_size in conn.execute("SELECT key, size FROM results ORDER BY last_access"):
+                    if total <= self.max_bytes:
+                        break
+                    if old_key != key:
+                        evicted.append((old_key,))
+                        total -= old_size
+                conn.executemany("DELETE FROM results WHERE key = ?", evicted)
+                conn.execute("UPDATE counters SET value = value + ? WHERE name = 'evictions'", (len(evicted),))
+
+    def stats(self) -> dict:
+        """
+        Return hit/miss counts, the hit rate, entry count and stored bytes.
+        """
+        self.flush()
+        with self._transaction() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+            "evictions": counters["evictions"],
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def clear(self) -> None:
+        """
+        Remove every stored result and reset the counters.
+        """
+        self._take_pending()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM results")
+            conn.execute("UPDATE counters SET value = 0")
+
+
+# Connection wrapper that runs the block as one immediate transaction and closes afterwards
+class _Transaction:
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.conn.close()
+
+
+_default_store = None
+
+
+# Process-wide default store
+def get_default_store() -> ResultStore:
+    global _default_store
+    if _default_store is None:
+        _default_store = ResultStore()
+    return _default_store
+
+
+# Call a pricing function through the store
+def cached_call(func, *args, store: ResultStore = None, depends_on: tuple = (), **kwargs):
+    """
+    Return a stored result for func(*args, **kwargs), computing and storing it on a miss.
+
+    The key covers the function name, every bound argument (defaults
+    included, so engine settings such as N or iterations are part of it,
+    and numbers compared as floats) and the source of the defining module,
+    the ENGINE_MODULES and any extra `depends_on` modules. Array results are
+    stored with a marker and come back as arrays on a hit.
+
+    Parameters:
+    - func: Pricing function returning a JSON-serialisable result
+    - args, kwargs: Arguments for func
+    - store: Store to use; defaults to get_default_store()
+    - depends_on: Further module names whose source the result depends on (tuple)
+
+    Returns:
+    - The result of func (JSON round-tripped on a hit).
+    """
+    store = store if store is not None else get_default_store()
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    params = {name: _normalize(value) for name, value in bound.arguments.items()}
+    version = code_version(func.__module__, *ENGINE_MODULES, *depends_on)
+    key = make_key(f"{func.__module__}.{func.__qualname__}", params, version)
+    stored = store.get(key)
+    if stored is not None:
+        return np.asarray(stored["ndarray"]) if isinstance(stored, dict) and "ndarray" in stored else stored
+    result = func(*args, **kwargs)
+    store.put(key, {"ndarray": result} if isinstance(result, np.ndarray) else result)
+    return result
@@ -0,0 +1,341 @@
+import numpy as np
+import streamlit as st
+from black_scholes import black_scholes
+from bachelier import bachelier_option_pricing
+from page_fragments import price_panel, sweep_panel
+
+VOL_TYPES = ("lognormal", "normal")
+
+# Largest |rho| used in the smile formulas, keeping x(z) finite
+MAX_RHO = 0.9999
+
+
+# z / x(z) factor of the Hagan expansions, with its small-z limit
+def _z_over_x(z: np.ndarray, rho: np.ndarray) -> np.ndarray:
+    rho = np.clip(rho, -MAX_RHO, MAX_RHO)
+    small = np.abs(z) < 1e-7
+    z_safe = np.where(small, 1e-7, z)
+    x = np.log((np.sqrt(1.0 - 2.0 * rho * z_safe + z_safe ** 2) + z_safe - rho) / (1.0 - rho))
+    return np.where(small, 1.0 - 0.5 * rho * z, z_safe / x)
+
+
+# Hagan lognormal (Black) implied volatility under SABR
+def hagan_lognormal_vol(F, K, T, alpha, beta, rho, nu) -> np.ndarray:
+    """
+    Hagan et al. (2002) lognormal implied-volatility approximation for SABR.
+
+    All arguments broadcast against each other, so a whole surface is one
+    call, e.g. F[:, None], K (expiries x strikes), T[:, None] and the
+    per-expiry parameters as [:, None] columns.
+
+    Parameters:
+    - F: Forward price (float or array)
+    - K: Strike price (float or array)
+    - T: Time to expiry in years (float or array)
+    - alpha: Initial volatility level (float or array)
+    - beta: CEV exponent in [0, 1] (float or array)
+    - rho: Correlation of the forward and its volatility (float or array)
+    - nu: Volatility of volatility (float or array)
+
+    Returns:
+    - The implied Black volatility (np.ndarray).
+    """
+    F, K, T, alpha, beta, rho, nu = (np.asarray(a, dtype=float) for a in (F, K, T, alpha, beta, rho, nu))
+    one_minus_beta = 1.0 - beta
+    log_fk = np.log(F / K)
+    fk_pow = (F * K) ** (0.5 * one_minus_beta)
+    z = nu / alpha * fk_pow * log_fk
+    denominator = fk_pow * (1.0 + one_minus_beta ** 2 / 24.0 * log_fk ** 2 + one_minus_beta ** 4 / 1920.0 * log_fk ** 4)
+    correction = 1.0 + (one_minus_beta ** 2 / 24.0 * alpha ** 2 / fk_pow ** 2
+                        + 0.25 * rho * beta * nu * alpha / fk_pow
+                        + (2.0 - 3.0 * rho ** 2) / 24.0 * nu ** 2) * T
+    return alpha / denominator * _z_over_x(z, rho) * correction
+
+
+# Hagan normal (Bachelier) implied volatility under SABR
+def hagan_normal_vol(F, K, T, alpha, beta, rho, nu) -> np.ndarray:
+    """
+    Hagan et al. (2002) normal implied-volatility approximation for SABR.
+
+    Broadcasts like hagan_lognormal_vol. The result is an absolute
+    volatility (price units per square root of a year).
+
+    Parameters:
+    - F: Forward price (float or array)
+    - K: Strike price (float or array)
+    - T: Time to expiry in years (float or array)
+    - alpha: Initial volatility level (float or array)
+    - beta: CEV exponent in [0, 1] (float or array)
+    - rho: Correlation of the forward and its volatility (float or array)
+    - nu: Volatility of volatility (float or array)
+
+    Returns:
+    - The implied normal volatility (np.ndarray).
+    """
+    F, K, T, alpha, beta, rho, nu = (np.asarray(a, dtype=float) for a in (F, K, T, alpha, beta, rho, nu))
+    one_minus_beta = 1.0 - beta
+    log_fk = np.log(F / K)
+    fk = F * K
+    z = nu / alpha * (F - K) / fk ** (0.5 * beta)
+    moneyness = (1.0 + log_fk ** 2 / 24.0 + log_fk ** 4 / 1920.0) / \
+        (1.0 + one_minus_beta ** 2 / 24.0 * log_fk ** 2 + one_minus_beta ** 4 / 1920.0 * log_fk ** 4)
+    correction = 1.0 + (-beta * (2.0 - beta) / 24.0 * alpha ** 2 / fk ** one_minus_beta
+                        + 0.25 * rho * beta * nu * alpha / fk ** (0.5 * one_minus_beta)
+                        + (2.0 - 3.0 * rho ** 2) / 24.0 * nu ** 2) * T
+    return alpha * fk ** (0.5 * beta) * moneyness * _z_over_x(z, rho) * correction
+
+
+# Implied volatility of the chosen type
+def sabr_vol(F, K, T, alpha, beta, rho, nu, vol_type: str = 'lognormal') -> np.ndarray:
+    if vol_type == 'lognormal':
+        return hagan_lognormal_vol(F, K, T, alpha, beta, rho, nu)
+    if vol_type == 'normal':
+        return hagan_normal_vol(F, K, T, alpha, beta, rho, nu)
+    raise ValueError(f"vol_type must be one of {VOL_TYPES}, got {vol_type!r}")
+
+
+# SABR option price through the Black-Scholes or Bachelier formula
+def sabr_option_pricing(S, X, T, r, alpha, beta, rho, nu, option_type: str = 'call', vol_type: str = 'lognormal'):
+    """
+    Price European options off the SABR smile.
+
+    The forward is S * exp(r * T). The lognormal smile is priced with
+    black_scholes. The normal smile is priced with bachelier_option_pricing
+    on the forward and discounted, with the absolute volatility passed as a
+    volatility relative to the forward.
+
+    Parameters:
+    - S: Stock price (float or array)
+    - X: Strike price (float or array)
+    - T: Time to maturity in years (float or array)
+    - r: Risk-free interest rate (float or array)
+    - alpha, beta, rho, nu: SABR parameters (float or array)
+    - option_type: 'call' or 'put' (str)
+    - vol_type: 'lognormal' or 'normal' (str)
+
+    Returns:
+    - The option price (float or np.ndarray).
+    """
+    F = S * np.exp(r * T)
+    vol = sabr_vol(F, X, T, alpha, beta, rho, nu, vol_type)
+    if vol_type == 'lognormal':
+        return black_scholes(S, X, T, r, vol, option_type)
+    return np.exp(-r * T) * bachelier_option_pricing(F, X, T, r, vol / F, option_type)
+
+
+# Map unconstrained coordinates to (alpha, rho, nu)
+def _from_unconstrained(u: np.ndarray):
+    return np.exp(u[:, 0]), MAX_RHO * np.tanh(u[:, 1]), np.exp(u[:, 2])
+
+
+# Calibrate SABR per expiry with a batched Levenberg-Marquardt fit
+def calibrate_sabr(F, T, strikes, vols, beta: float = 0.5, vol_type: str = 'lognormal', weights=None,
+                   max_iter: int = 100, tol: float = 1e-12) -> dict:
+    """
+    Fit alpha, rho and nu to the market smile of every expiry at once, with beta fixed.
+
+    All expiries are solved together by one vectorized Levenberg-Marquardt
+    iteration: residuals, finite-difference Jacobians and the 3x3 normal
+    equations are evaluated for every expiry in the same array operations,
+    with a damping factor per expiry. The parameters are fitted as
+    log(alpha), atanh(rho) and log(nu), so every step stays admissible.
+    Missing quotes can be given as NaN.
+
+    Parameters:
+    - F: Forward of each expiry (array of E)
+    - T: Time to each expiry in years (array of E)
+    - strikes: Strikes per expiry (E x K array, or K strikes shared by all expiries)
+    - vols: Market implied volatilities (E x K array)
+    - beta: Fixed CEV exponent (float)
+    - vol_type: Type of the market vols, 'lognormal' or 'normal' (str)
+    - weights: Residual weights (E x K array), equal by default
+    - max_iter: Maximum number of iterations (int)
+    - tol: Relative decrease of the squared error below which an expiry has converged (float)
+
+    Returns:
+    - A dict of per-expiry arrays 'alpha', 'rho', 'nu', 'rmse' and 'converged', plus 'beta' and 'iterations'.
+    """
+    F = np.atleast_1d(np.asarray(F, dtype=float))
+    T = np.atleast_1d(np.asarray(T, dtype=float))
+    vols = np.atleast_2d(np.asarray(vols, dtype=float))
+    strikes = np.broadcast_to(np.asarray(strikes, dtype=float), vols.shape)
+    weights = np.ones(vols.shape) if weights is None else np.broadcast_to(np.asarray(weights, dtype=float), vols.shape)
+    quoted = np.isfinite(vols)
+    weights = np.where(quoted, weights, 0.0)
+    market = np.where(quoted, vols, 0.0)
+    n_quotes = np.maximum(quoted.sum(axis=1), 1)
+
+    def residuals(u):
+        alpha, rho, nu = _from_unconstrained(u)
+        model = sabr_vol(F[:, None], strikes, T[:, None], alpha[:, None], beta, rho[:, None], nu[:, None], vol_type)
+        return weights * np.where(quoted, model - market, 0.0)
+
+    # Start from the at-the-money quote: alpha ~ sigma_ATM * F^(1 - beta) (lognormal) or sigma_N / F^beta (normal)
+    atm = np.argmin(np.where(quoted, np.abs(strikes - F[:, None]), np.inf), axis=1)
+    atm_vol = market[np.arange(F.size), atm]
+    alpha0 = atm_vol * F ** (1.0 - beta) if vol_type == 'lognormal' else atm_vol / F ** beta
+    u = np.column_stack([np.log(alpha0), np.zeros(F.size), np.full(F.size, np.log(0.5))])
+
+    res = residuals(u)
+    cost = (res ** 2).sum(axis=1)
+    damping = np.full(F.size, 1e-3)
+    converged = np.zeros(F.size, dtype=bool)
+    step_size = 1e-6
+    for iteration in range(1, max_iter + 1):
+        active = ~converged
+        # Forward-difference Jacobian, one column per parameter for all expiries at once
+        jacobian = np.empty(res.shape + (3,))
+        for j in range(3):
+            shifted = u.copy()
+            shifted[:, j] += step_size
+            jacobian[:, :, j] = (residuals(shifted) - res) / step_size
+        JtJ = np.einsum('eki,ekj->eij', jacobian, jacobian)
+        Jtr = np.einsum('eki,ek->ei', jacobian, res)
+        diagonal = np.einsum('eii->ei', JtJ)
+
+        system = JtJ + (damping[:, None] * diagonal + 1e-12)[:, :, None] * np.eye(3)
+        step = np.linalg.solve(system, -Jtr[:, :, None])[:, :, 0]
+        candidate = np.clip(u + np.where(active[:, None], step, 0.0), [-20.0, -10.0, -10.0], [10.0, 10.0, 3.0])
+
+        candidate_res = residuals(candidate)
+        candidate_cost = (candidate_res ** 2).sum(axis=1)
+        improved = active & (candidate_cost < cost)
+        decrease = np.where(improved, cost - candidate_cost, 0.0)
+        converged |= active & ((improved & (decrease <= tol * np.maximum(cost, 1e-300)))
+                               | (cost <= tol) | (damping > 1e12))
+
+        u[improved] = candidate[improved]
+        res[improved] = candidate_res[improved]
+        cost[improved] = candidate_cost[improved]
+        damping = np.where(improved, damping * 0.3, damping * 10.0)
+        if converged.all():
+            break
+
+    alpha, rho, nu = _from_unconstrained(u)
+    return {
+        'alpha': alpha,
+        'beta': beta,
+        'rho': rho,
+        'nu': nu,
+        'rmse': np.sqrt(cost / n_quotes),
+        'converged': converged,
+        'iterations': iteration,
+    }
+
+
+# Page computations, cached on their own inputs so unrelated widget changes reuse them
+@st.cache_data(show_spinner=False)
+def _prices(S0, X, T, r, alpha, beta, rho, nu, vol_type):
+    vol = float(sabr_vol(S0 * np.exp(r * T), X, T, alpha, beta, rho, nu, vol_type))
+    note = f"σ = {vol:.2%} (lognormal)" if vol_type == 'lognormal' else f"σ = {vol:.2f} (normal)"
+    return (sabr_option_pricing(S0, X, T, r, alpha, beta, rho, nu, 'call', vol_type),
+            sabr_option_pricing(S0, X, T, r, alpha, beta, rho, nu, 'put', vol_type), note, note)
+
+@st.cache_data(show_spinner=False)
+def _smile(S0, T, r, alpha, beta, rho, nu, vol_type):
+    strikes = np.linspace(0.5 * S0, 1.5 * S0, 100)
+    return strikes, {'Implied Volatility': sabr_vol(S0 * np.exp(r * T), strikes, T, alpha, beta, rho, nu, vol_type)}
+
+@st.cache_data(show_spinner=False)
+def _strike_sweep(S0, T, r, alpha, beta, rho, nu, vol_type):
+    strikes = np.linspace(0.5 * S0, 1.5 * S0, 100)
+    return strikes, {
+        'Call Option': sabr_option_pricing(S0, strikes, T, r, alpha, beta, rho, nu, 'call', vol_type),
+        'Put Option': sabr_option_pricing(S0, strikes, T, r, alpha, beta, rho, nu, 'put', vol_type),
+    }
+
+# SABR model page
+def show_sabr_page():
+    st.title("SABR Stochastic Volatility Model")
+
+    # Input layout
+    col1, col2 = st.columns([1, 2])  # Adjusted to give more space to the graphs
+
+    with col1:
+        S0 = st.number_input("Stock Price (S0)", value=100.0, step=1.0, format="%.2f")
+        X = st.number_input("Strike Price (X)", value=100.0, step=1.0, format="%.2f")
+        T = st.slider("Time to Maturity (T)", min_value=0.01, max_value=5.0, value=1.0, step=0.01)
+        r = st.slider("Risk-Free Rate (r)", min_value=0.0, max_value=0.2, value=0.05, step=0.001)
+        alpha = st.number_input("Initial Volatility (α)", value=2.0, min_value=0.001, step=0.1, format="%.3f")
+        beta = st.slider("CEV Exponent (β)", min_value=0.0, max_value=1.0, value=0.5, step=0.05)
+        rho = st.slider("Correlation (ρ)", min_value=-0.99, max_value=0.99, value=-0.3, step=0.01)
+        nu = st.slider("Volatility of Volatility (ν)", min_value=0.01, max_value=2.0, value=0.4, step=0.01)
+        vol_type = st.radio("Smile", VOL_TYPES, format_func=lambda v: {
+            'lognormal': "Lognormal (Black-Scholes)", 'normal': "Normal (Bachelier)"}[v], horizontal=True)
+
+        # Add padding between inputs and price boxes
+        st.markdown("<div style='padding-top:20px;'></div>", unsafe_allow_html=True)
+
+        # Calculate the call and put option prices with the implied volatility at the strike
+        price_panel(_prices, dict(S0=S0, X=X, T=T, r=r, alpha=alpha, beta=beta, rho=rho, nu=nu, vol_type=vol_type))
+        defer = st.toggle("Defer chart updates until Apply", key="sabr_defer")
+
+    # Graphs placed next to the inputs; each chart is its own fragment and only
+    # recomputes when its own inputs change
+    smile_inputs = dict(S0=S0, T=T, r=r, alpha=alpha, beta=beta, rho=rho, nu=nu, vol_type=vol_type)
+    with col2:
+        # Implied volatility smile (first graph)
+        sweep_panel(
+            "sabr_smile", _smile, smile_inputs,
+            dict(
+                title="Implied Volatility vs. Strike",
+                xaxis_title="Strike Price (X)",
+                yaxis_title="Implied Volatility",
+                height=350  # Increased height for better clarity
+            ),
+            colors={'Implied Volatility': 'purple'},
+            deferred=defer
+        )
+
+        # Option prices across strikes (second graph)
+        sweep_panel(
+            "sabr_strike", _strike_sweep, smile_inputs,
+            dict(
+                title="Option Prices vs. Strike",
+                xaxis_title="Strike Price (X)",
+                yaxis_title="Option Price",
+                height=350  # Increased height for better clarity
+            ),
+            deferred=defer
+        )
+
+    # SABR Formula with LaTeX rendering and explanations on the sides
+    col_left, col_center, col_right = st.columns([1, 2, 1])
+
+    with col_left:
+        st.markdown(
+            """
+            **Initial Volatility (\( \\alpha \)):**<br>
+            The starting level of the stochastic volatility. Together with \( \\beta \) it sets the at-the-money volatility, roughly \( \\alpha / F^{1-\\beta} \).<br><br>
+
+            **CEV Exponent (\( \\beta \)):**<br>
+            Controls how volatility scales with the forward: \( \\beta = 1 \) is lognormal, \( \\beta = 0 \) is normal. It is usually fixed by the desk and not calibrated.
+            """, unsafe_allow_html=True
+        )
+
+    with col_center:
+        st.latex(r"dF = \alpha F^{\beta} dW_1, \quad d\alpha = \nu \alpha dW_2, \quad dW_1 dW_2 = \rho \, dt")
+        st.latex(r"\sigma_B(K) \approx \frac{\alpha}{(FK)^{(1-\beta)/2}} \frac{z}{x(z)} \left[1 + \left(\frac{(1-\beta)^2 \alpha^2}{24 (FK)^{1-\beta}} + \frac{\rho \beta \nu \alpha}{4 (FK)^{(1-\beta)/2}} + \frac{2 - 3\rho^2}{24} \nu^2\right) T\right]")
+        st.latex(r"z = \frac{\nu}{\alpha} (FK)^{(1-\beta)/2} \ln\frac{F}{K}, \quad x(z) = \ln\frac{\sqrt{1 - 2\rho z + z^2} + z - \rho}{1 - \rho}")
+
+    with col_right:
+        st.markdown(
+            """
+            **Correlation (\( \\rho \)):**<br>
+            The correlation between the forward and its volatility. Negative values tilt the smile into a skew, raising the volatility of low strikes.<br><br>
+
+            **Volatility of Volatility (\( \\nu \)):**<br>
+            How much the volatility itself moves. Higher values add curvature to the smile, making out-of-the-money options on both sides more expensive.
+            """, unsafe_allow_html=True
+        )
+
+    # Space before the link
+    st.markdown("<br><br>", unsafe_allow_html=True)
+
+    # Link to the SABR model paper
+    st.markdown(
+        "[Read more about the SABR model here](https://en.wikipedia.org/wiki/SABR_volatility_model)"
+    )
+
+# Run the SABR model page
+# show_sabr_page()
@@ -0,0 +1,218 @@
+import asyncio
+import csv
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from black_scholes import black_scholes
+
+
+# Replay quotes from a CSV file with columns timestamp, underlying, price
+async def replay_quotes(path: str, speed: float = None):
+    """
+    Yield (underlying, price) quotes from a file, optionally paced by their timestamps.
+
+    Parameters:
+    - path: CSV file with a header row and columns timestamp, underlying, price (str)
+    - speed: Replay speed relative to the recorded timestamps; None replays as fast as possible (float)
+    """
+    previous = None
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            timestamp = float(row["timestamp"])
+            if speed and previous is not None and timestamp > previous:
+                await asyncio.sleep((timestamp - previous) / speed)
+            else:
+                await asyncio.sleep(0)
+            previous = timestamp
+            yield row["underlying"], float(row["price"])
+
+
+# Receive quotes as "underlying,price" lines on a local TCP socket
+async def socket_quotes(host: str = "127.0.0.1", port: int = 8765):
+    """
+    Yield (underlying, price) quotes sent by any client connected to a local socket.
+
+    A client may send the line "END" to stop the stream.
+
+    Parameters:
+    - host: Interface to listen on (str)
+    - port: TCP port (int)
+    """
+    queue = asyncio.Queue()
+
+    async def handle(reader, writer):
+        while line := await reader.readline():
+            text = line.decode().strip()
+            if text == "END":
+                queue.put_nowait(None)
+                break
+            if text:
+                underlying, price = text.split(",")
+                queue.put_nowait((underlying.strip(), float(price)))
+        writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        while (quote := await queue.get()) is not None:
+            yield quote
+
+
+# Load a book from a CSV file with columns id, underlying, strike, maturity, rate, volatility, option_type
+def load_book(path: str) -> list:
+    with open(path, newline="") as f:
+        return [
+            {
+                "id": row["id"],
+                "underlying": row["underlying"],
+                "strike": float(row["strike"]),
+                "maturity": float(row["maturity"]),
+                "rate": float(row["rate"]),
+                "volatility": float(row["volatility"]),
+                "option_type": row["option_type"],
+            }
+            for row in csv.DictReader(f)
+        ]
+
+
+# Book of contracts repriced incrementally as quotes arrive
+class LiveBook:
+    """
+    Keep the prices of a book of options live from a stream of underlying quotes.
+
+    Contracts are indexed by underlying, so a quote only reprices the
+    contracts that depend on it. Quotes that arrive while a batch is being
+    priced are coalesced to the latest price per underlying and the affected
+    contracts are repriced together in one vectorized call, run in a worker
+    thread so the quote source keeps being read meanwhile. Tick-to-price
+    latency is recorded for every quote, including coalesced ones.
+
+    Parameters:
+    - contracts: Dicts with id, underlying, strike, maturity, rate, volatility and option_type (list)
+    - pricer: Vectorized pricing function with the black_scholes signature
+    - publish: Callback receiving {'ids', 'prices', 'latency'} after each batch
+    - latency_window: Number of recent latencies kept for the percentiles (int)
+    """
+
+    def __init__(self, contracts: list, pricer=black_scholes, publish=None, latency_window: int = 100000):
+        self.ids = [c["id"] for c in contracts]
+        self.strikes = np.array([c["strike"] for c in contracts], dtype=float)
+        self.maturities = np.array([c["maturity"] for c in contracts], dtype=float)
+        self.rates = np.array([c["rate"] for c in contracts], dtype=float)
+        self.volatilities = np.array([c["volatility"] for c in contracts], dtype=float)
+        self.is_call = np.array([c["option_type"] == "call" for c in contracts])
+        self.spots = np.full(len(contracts), np.nan)
+        self.prices = np.full(len(contracts), np.nan)
+        self.pricer = pricer
+        self.publish = publish
+
+        # Dependency index: underlying -> positions of the contracts written on it
+        underlyings = np.array([c["underlying"] for c in contracts])
+        self.dependents = {u: np.flatnonzero(underlyings == u) for u in np.unique(underlyings)}
+
+        self.latencies = deque(maxlen=latency_window)
+        self.ticks = 0
+        self.batches = 0
+
+    def reprice(self, quotes: dict) -> np.ndarray:
+        """
+        Apply the latest quote per underlying and reprice the dependent contracts in one batch.
+
+        Parameters:
+        - quotes: Mapping of underlying to its latest price (dict)
+
+        Returns:
+        - Positions of the repriced contracts (np.ndarray).
+        """
+        affected = [self.dependents[u] for u in quotes if u in self.dependents]
+        if not affected:
+            return np.empty(0, dtype=int)
+        for underlying, price in quotes.items():
+            if underlying in self.dependents:
+                self.spots[self.dependents[underlying]] = price
+        idx = np.concatenate(affected)
+
+        for option_type, mask in (("call", self.is_call[idx]), ("put", ~self.is_call[idx])):
+            sel = idx[mask]
+            if sel.size:
+                self.prices[sel] = self.pricer(self.spots[sel], self.strikes[sel], self.maturities[sel],
+                                               self.rates[sel], self.volatilities[sel], option_type)
+        return idx
+
+    def latency_stats(self) -> dict:
+        """
+        Return tick-to-price latency percentiles in milliseconds with tick and batch counts.
+        """
+        if not self.latencies:
+            return {"ticks": self.ticks, "batches": self.batches}
+        p50, p95, p99 = np.percentile(np.array(self.latencies) * 1000.0, [50, 95, 99])
+        return {
+            "ticks": self.ticks,
+            "batches": self.batches,
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": max(self.latencies) * 1000.0,
+        }
+
+    async def run(self, quotes) -> dict:
+        """
+        Consume an async iterable of (underlying, price) quotes until it ends.
+
+        Returns:
+        - The final latency statistics (dict).
+        """
+        queue = asyncio.Queue()
+
+        async def produce():
+            try:
+                async for underlying, price in quotes:
+                    queue.put_nowait((underlying, price, time.perf_counter()))
+            finally:
+                queue.put_nowait(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            done = False
+            while not done:
+                batch = [await queue.get()]
+                # Coalesce everything that queued up while the previous batch was priced
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+                if batch[-1] is None:
+                    batch.pop()
+                    done = True
+                if not batch:
+                    continue
+
+                latest = {underlying: price for underlying, price, _ in batch}
+                # Price off the event loop, so quotes keep queuing up during the batch
+                idx = await asyncio.to_thread(self.reprice, latest)
+                now = time.perf_counter()
+                self.latencies.extend(now - received for _, _, received in batch)
+                self.ticks += len(batch)
+                self.batches += 1
+
+                if self.publish is not None:
+                    self.publish({
+                        "ids": [self.ids[i] for i in idx],
+                        "prices": self.prices[idx],
+                        "latency": self.latency_stats(),
+                    })
+        except BaseException:
+            producer.cancel()
+            raise
+        await producer  # Surface errors raised by the quote source
+        return self.latency_stats()
+
+
+# Replay a quote file against a book and print the latency percentiles
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python streaming.py BOOK_CSV QUOTES_CSV [SPEED]")
+        sys.exit(1)
+    book = LiveBook(load_book(sys.argv[1]))
+    speed = float(sys.argv[3]) if len(sys.argv) > 3 else None
+    print(asyncio.run(book.run(replay_quotes(sys.argv[2], speed))))
@@ -0,0 +1,431 @@
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import socket
+import time
+
+import numpy as np
+
+from black_scholes import black_scholes
+from binomial import binomial_option_pricing
+from monte_carlo import monte_carlo_option_pricing, monte_carlo_option_pricing_stats
+from heston import heston_price
+from bachelier import bachelier_option_pricing
+from lsm import lsm_american_option_pricing
+from sabr import sabr_option_pricing
+
+# Models a sweep can run, called with each point's parameters as keyword arguments
+MODELS = {
+    "black_scholes": black_scholes,
+    "binomial": binomial_option_pricing,
+    "monte_carlo": monte_carlo_option_pricing,
+    "monte_carlo_stats": monte_carlo_option_pricing_stats,
+    "heston": heston_price,
+    "bachelier": bachelier_option_pricing,
+    "lsm": lsm_american_option_pricing,
+    "sabr": sabr_option_pricing,
+}
+
+
+# JSON encoding for NumPy scalars and arrays returned by the models
+def _json_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Cannot serialise value of type {type(obj).__name__}")
+
+
+# Expand a job into its list of parameter points
+def expand_points(job: dict) -> list:
+    """
+    Expand a job spec into parameter points.
+
+    A job names a model and either lists its points explicitly under
+    "points" or gives "fixed" parameters plus "sweep" axes, whose Cartesian
+    product is taken in the order the axes are listed.
+
+    Parameters:
+    - job: Job spec with "model" and "points" or "fixed"/"sweep" (dict)
+
+    Returns:
+    - One parameter dict per point (list).
+    """
+    if job["model"] not in MODELS:
+        raise ValueError(f"Unknown model {job['model']!r}; expected one of {sorted(MODELS)}")
+    if "points" in job:
+        return [dict(job.get("fixed", {}), **point) for point in job["points"]]
+    axes = list(job.get("sweep", {}).items())
+    names = [name for name, _ in axes]
+    return [dict(job.get("fixed", {}), **dict(zip(names, values)))
+            for values in itertools.product(*(values for _, values in axes))]
+
+
+# Split a job into fixed-size tasks
+def make_tasks(job: dict) -> list:
+    points = expand_points(job)
+    chunk_size = int(job.get("chunk_size", 100))
+    return [{"task_id": i, "model": job["model"], "start": start, "points": points[start:start + chunk_size]}
+            for i, start in enumerate(range(0, len(points), chunk_size))]
+
+
+# Worker side: price the points of a task
+def run_task(task: dict) -> list:
+    func = MODELS[task["model"]]
+    return [func(**point) for point in task["points"]]
+
+
+# Send one JSON message per line
+def _encode(message: dict) -> bytes:
+    return (json.dumps(message, default=_json_default) + "\n").encode()
+
+
+# Coordinator that dispatches tasks to TCP workers and checkpoints finished chunks
+class SweepCoordinator:
+    """
+    Dispatch a sweep's tasks to workers over TCP and checkpoint each finished chunk.
+
+    Workers connect, announce themselves and are sent one task at a time.
+    Each completed chunk is written to the checkpoint directory, so a rerun
+    of the same job skips it. Failed or timed-out tasks are requeued up to
+    max_retries times. A worker that disconnects or exceeds task_timeout is
+    dropped; requeued tasks wait for another worker to connect, and
+    live_workers counts the workers currently connected. A chunk that
+    cannot be checkpointed fails the whole sweep, as no retry can succeed;
+    wait() then raises RuntimeError.
+
+    Parameters:
+    - job: Job spec, see expand_points (dict)
+    - checkpoint_dir: Directory for the manifest and per-chunk results (str)
+    - host: Interface to listen on (str)
+    - port: TCP port, 0 to pick a free one (int)
+    - task_timeout: Seconds a worker may spend on one task (float)
+    - max_retries: Extra attempts per task after the first (int)
+    """
+
+    def __init__(self, job: dict, checkpoint_dir: str, host: str = "127.0.0.1", port: int = 0,
+                 task_timeout: float = 300.0, max_retries: int = 3):
+        self.job = job
+        self.checkpoint_dir = checkpoint_dir
+        self.host = host
+        self.port = port
+        self.task_timeout = task_timeout
+        self.max_retries = max_retries
+        self.tasks = {task["task_id"]: task for task in make_tasks(job)}
+        self.stats = {task_id: {"attempts": 0, "elapsed": None, "wall": None, "worker": None} for task_id in self.tasks}
+        self.completed = set()
+        self.failed = set()
+        self.resumed = 0
+        self.live_workers = 0
+        self.error = None
+        self._prepare_checkpoints()
+
+    def _chunk_path(self, task_id: int) -> str:
+        return os.path.join(self.checkpoint_dir, f"chunk_{task_id:06d}.json")
+
+    def _prepare_checkpoints(self) -> None:
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        job_hash = hashlib.sha256(json.dumps(self.job, sort_keys=True).encode()).hexdigest()
+        manifest = os.path.join(self.checkpoint_dir, "manifest.json")
+        if os.path.exists(manifest):
+            with open(manifest) as f:
+                if json.load(f)["job_hash"] != job_hash:
+                    raise ValueError(f"{self.checkpoint_dir} holds checkpoints of a different job")
+        else:
+            with open(manifest, "w") as f:
+                json.dump({"job_hash": job_hash, "job": self.job}, f)
+        for task_id in self.tasks:
+            if os.path.exists(self._chunk_path(task_id)):
+                self.completed.add(task_id)
+        self.resumed = len(self.completed)
+
+    def _write_checkpoint(self, task_id: int, results: list) -> None:
+        path = self._chunk_path(task_id)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"task_id": task_id, "start": self.tasks[task_id]["start"], "results": results}, f,
+                      default=_json_default)
+        os.replace(path + ".tmp", path)  # Atomic, so an interrupted write never looks complete
+
+    def results(self) -> list:
+        """
+        Collect the checkpointed results in point order, with None for the points of failed chunks.
+        """
+        results = [None] * sum(len(task["points"]) for task in self.tasks.values())
+        for task_id in sorted(self.completed):
+            with open(self._chunk_path(task_id)) as f:
+                chunk = json.load(f)
+            results[chunk["start"]:chunk["start"] + len(chunk["results"])] = chunk["results"]
+        return results
+
+    def report(self) -> dict:
+        return {
+            "tasks": len(self.tasks),
+            "completed": len(self.completed),
+            "resumed": self.resumed,
+            "live_workers": self.live_workers,
+            "failed": sorted(self.failed),
+            "error": self.error,
+            "retries": sum(max(s["attempts"] - 1, 0) for s in self.stats.values()),
+            "task_stats": self.stats,
+        }
+
+    async def start(self) -> int:
+        """
+        Start listening and return the bound port.
+        """
+        self._queue = asyncio.Queue()
+        self._finished = asyncio.Event()
+        self._writers = set()
+        for task_id in sorted(set(self.tasks) - self.completed):
+            self._queue.put_nowait(task_id)
+        if not self._queue.qsize():
+            self._finished.set()
+        self._server = await asyncio.start_server(self._handle_worker, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def wait(self) -> dict:
+        """
+        Wait until every task has completed or failed, then stop the server and return the report.
+        """
+        await self._finished.wait()
+        self._server.close()
+        await self._server.wait_closed()
+        if self.error is not None:
+            raise RuntimeError(f"Sweep failed: {self.error}")
+        return self.report()
+
+    async def run(self) -> dict:
+        await self.start()
+        return await self.wait()
+
+    def _task_done(self, task_id: int, ok: bool) -> None:
+        if ok:
+            self.completed.add(task_id)
+        elif self.stats[task_id]["attempts"] > self.max_retries:
+            self.failed.add(task_id)
+        else:
+            self._queue.put_nowait(task_id)
+        if len(self.completed) + len(self.failed) == len(self.tasks):
+            self._finished.set()
+
+    def _fail(self, error: str) -> None:
+        # Stop the sweep: every unfinished task fails and busy workers are disconnected
+        self.error = error
+        self.failed |= set(self.tasks) - self.completed
+        self._finished.set()
+        for writer in self._writers:
+            writer.close()
+
+    async def _next_task(self):
+        get = asyncio.ensure_future(self._queue.get())
+        finished = asyncio.ensure_future(self._finished.wait())
+        done, _ = await asyncio.wait({get, finished}, return_when=asyncio.FIRST_COMPLETED)
+        if get in done:
+            finished.cancel()
+            return get.result()
+        get.cancel()
+        return None
+
+    async def _handle_worker(self, reader, writer):
+        worker = None
+        connected = False
+        self._writers.add(writer)
+        try:
+            hello = json.loads(await reader.readline())
+            worker = hello.get("worker")
+            self.live_workers += 1
+            connected = True
+            while (task_id := await self._next_task()) is not None:
+                stats = self.stats[task_id]
+                stats["attempts"] += 1
+                stats["worker"] = worker
+                sent = time.perf_counter()
+                try:
+                    writer.write(_encode({"type": "task", **self.tasks[task_id]}))
+                    await writer.drain()
+                    line = await asyncio.wait_for(reader.readline(), self.task_timeout)
+                    if not line:
+                        raise ConnectionError("worker disconnected")
+                    reply = json.loads(line)
+                except (asyncio.TimeoutError, ConnectionError, ValueError) as exc:
+                    # The worker is lost or stuck: requeue the task and drop the connection
+                    stats["error"] = repr(exc)
+                    self._task_done(task_id, False)
+                    return
+
+                try:
+                    if reply.get("type") == "result" and reply.get("task_id") == task_id:
+                        self._write_checkpoint(task_id, reply["results"])
+                        stats["elapsed"] = reply.get("elapsed")
+                        stats["wall"] = time.perf_counter() - sent
+                        self._task_done(task_id, True)
+                    else:
+                        stats["error"] = reply.get("message")
+                        self._task_done(task_id, False)
+                except OSError as exc:
+                    # The checkpoint could not be written (disk full, permissions); retrying cannot help
+                    stats["error"] = repr(exc)
+                    self._fail(f"could not checkpoint task {task_id}: {exc!r}")
+                    return
+                except Exception as exc:
+                    # A malformed reply: requeue the task and drop the connection
+                    stats["error"] = repr(exc)
+                    self._task_done(task_id, False)
+                    return
+            writer.write(_encode({"type": "done"}))
+            await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            if connected:
+                self.live_workers -= 1
+            self._writers.discard(writer)
+            writer.close()
+
+
+# Worker loop: connect to the coordinator and price tasks until told to stop
+def run_worker(host: str, port: int, worker_id: str = None, connect_timeout: float = 30.0) -> int:
+    """
+    Connect to a coordinator and run tasks until it sends "done".
+
+    Parameters:
+    - host: Coordinator host (str)
+    - port: Coordinator port (int)
+    - worker_id: Name reported in the task statistics (str)
+    - connect_timeout: Seconds to keep retrying the initial connection (float)
+
+    Returns:
+    - The number of tasks completed (int).
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            sock = socket.create_connection((host, port))
+            break
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+    done = 0
+    with sock, sock.makefile("rb") as reader:
+        sock.sendall(_encode({"type": "hello", "worker": worker_id}))
+        for line in reader:
+            message = json.loads(line)
+            if message["type"] != "task":
+                break
+            start = time.perf_counter()
+            try:
+                results = run_task(message)
+                reply = {"type": "result", "task_id": message["task_id"], "results": results,
+                         "elapsed": time.perf_counter() - start}
+                done += 1
+            except Exception as exc:
+                reply = {"type": "error", "task_id": message["task_id"], "message": repr(exc)}
+            try:
+                sock.sendall(_encode(reply))
+            except ConnectionError:
+                break  # The coordinator dropped us, e.g. after a task timeout
+    return done
+
+
+# Run a sweep with local worker processes
+def run_local_sweep(job: dict, checkpoint_dir: str, workers: int = 4, **coordinator_options) -> dict:
+    """
+    Run a sweep with a coordinator in this process and workers in local subprocesses.
+
+    Workers are started with the spawn method, so they do not inherit the
+    coordinator's listening socket. A worker process that exits before the
+    sweep is finished, e.g. after being dropped for a task timeout, is
+    replaced; tasks that keep failing end up failed after max_retries.
+
+    Parameters:
+    - job: Job spec, see expand_points (dict)
+    - checkpoint_dir: Directory for the checkpoints (str)
+    - workers: Number of worker processes, at least 1 (int)
+    - coordinator_options: Extra arguments for SweepCoordinator
+
+    Returns:
+    - The coordinator report with the combined 'results' (dict).
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    coordinator = SweepCoordinator(job, checkpoint_dir, **coordinator_options)
+
+    context = multiprocessing.get_context("spawn")
+
+    async def main():
+        port = await coordinator.start()
+        if coordinator._finished.is_set():
+            return await coordinator.wait()  # Every chunk is already checkpointed
+
+        spawned = 0
+
+        def spawn_worker():
+            nonlocal spawned
+            process = context.Process(target=run_worker, args=(coordinator.host, port, f"local-{spawned}"))
+            process.start()
+            spawned += 1
+            return process
+
+        processes = [spawn_worker() for _ in range(workers)]
+        waiter = asyncio.ensure_future(coordinator.wait())
+        while not waiter.done():
+            await asyncio.wait({waiter}, timeout=0.2)
+            if not waiter.done():
+                processes = [p if p.is_alive() else spawn_worker() for p in processes]
+        for process in processes:
+            # Workers exit on "done"; one still busy with a dropped task is no longer needed
+            await asyncio.to_thread(process.join, 5.0)
+            if process.is_alive():
+                process.terminate()
+        return waiter.result()
+
+    report = asyncio.run(main())
+    report["results"] = coordinator.results()
+    return report
+
+
+# Command line: coordinator, worker or a local run
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed parameter sweeps over the pricing models.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("coordinator", "local"):
+        command = commands.add_parser(name)
+        command.add_argument("job", help="JSON job spec")
+        command.add_argument("checkpoint_dir")
+        command.add_argument("--output", help="Write the combined results to this JSON file")
+    commands.choices["coordinator"].add_argument("--host", default="127.0.0.1")
+    commands.choices["coordinator"].add_argument("--port", type=int, default=8766)
+    commands.choices["local"].add_argument("--workers", type=int, default=4)
+    worker = commands.add_parser("worker")
+    worker.add_argument("host")
+    worker.add_argument("port", type=int)
+    args = parser.parse_args()
+    if args.command == "local" and args.workers < 1:
+        parser.error(f"--workers must be at least 1, got {args.workers}")
+
+    if args.command == "worker":
+        print(f"Completed {run_worker(args.host, args.port)} tasks")
+    else:
+        with open(args.job) as f:
+            job = json.load(f)
+        if args.command == "local":
+            report = run_local_sweep(job, args.checkpoint_dir, args.workers)
+        else:
+            coordinator = SweepCoordinator(job, args.checkpoint_dir, args.host, args.port)
+            report = asyncio.run(coordinator.run())
+            report["results"] = coordinator.results()
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report["results"], f)
+        summary = {k: v for k, v in report.items() if k not in ("results", "task_stats")}
+        print(json.dumps(summary))
+        for task_id, stats in report["task_stats"].items():
+            print(f"task {task_id}: attempts={stats['attempts']} elapsed={stats['elapsed']} worker={stats['worker']}")